@@ -0,0 +1,71 @@
+from typing import List
+import csv
+import io
+import json
+import os
+import zipfile
+
+BATCH_MAX_ITEMS = int(os.environ.get('BATCH_MAX_ITEMS', 5000))
+BATCH_CONCURRENCY = int(os.environ.get('BATCH_CONCURRENCY', 8))
+BATCH_MAX_FILE_BYTES = int(os.environ.get('BATCH_MAX_FILE_BYTES', 50 * 1024 * 1024))
+MINT_BATCH_SIZE = int(os.environ.get('MINT_BATCH_SIZE', 100))
+ARCHIVE_CHUNK_SIZE = 1024 * 1024
+
+# One row per student; "marksheet" is the file's path inside the zip archive
+MANIFEST_FIELDS = ['student_name', 'degree', 'institution', 'graduation_year', 'grade', 'marksheet']
+
+
+def parse_manifest(data: bytes, filename: str) -> List[dict]:
+    """Rows of a CSV (with a header line) or JSON (a list of objects) manifest."""
+    text = data.decode('utf-8-sig')
+    if (filename or '').lower().endswith('.json') or text.lstrip().startswith('['):
+        try:
+            rows = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Manifest is not valid JSON: {e}")
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            raise ValueError("JSON manifest must be a list of objects")
+    else:
+        reader = csv.DictReader(io.StringIO(text))
+        missing = [f for f in MANIFEST_FIELDS if f not in (reader.fieldnames or [])]
+        if missing:
+            raise ValueError(f"Manifest is missing column(s): {', '.join(missing)}")
+        rows = list(reader)
+    if not rows:
+        raise ValueError("Manifest has no rows")
+    if len(rows) > BATCH_MAX_ITEMS:
+        raise ValueError(f"Manifest has {len(rows)} rows; at most {BATCH_MAX_ITEMS} are allowed per batch")
+    return rows
+
+
+def validate_row(row: dict) -> dict:
+    fields = {}
+    for name in MANIFEST_FIELDS:
+        value = row.get(name)
+        if value is None or str(value).strip() == '':
+            raise ValueError(f"{name} is required")
+        fields[name] = str(value).strip()
+    try:
+        fields['graduation_year'] = int(fields['graduation_year'])
+    except ValueError:
+        raise ValueError("graduation_year must be a whole number")
+    return fields
+
+
+def store_archive_member(blob_store, archive: zipfile.ZipFile, name: str) -> str:
+    # Copied from the archive to the blob store in chunks, hashing on the way
+    try:
+        info = archive.getinfo(name)
+    except KeyError:
+        raise ValueError(f"{name} not found in the marksheet archive")
+    if info.file_size > BATCH_MAX_FILE_BYTES:
+        raise ValueError(f"{name} is larger than {BATCH_MAX_FILE_BYTES} bytes")
+    writer = blob_store.writer()
+    try:
+        with archive.open(info) as f:
+            while chunk := f.read(ARCHIVE_CHUNK_SIZE):
+                writer.write(chunk)
+        return writer.commit(os.path.basename(name))
+    except BaseException:
+        writer.abort()
+        raise
@@ -0,0 +1,97 @@
+"""Throughput of one-by-one issuance vs the batch issuance endpoint.
+
+    python bench_batch_issue.py [--items 500] [--latency-ms 2] [--file-kb 200]
+
+Builds a manifest and a zip of synthetic marksheets, then issues them once
+through N calls to /api/credentials/issue and once through a single call to
+/api/credentials/issue/batch. Runs in-process against the database stand-in
+with ``--latency-ms`` per query and a throwaway blob store.
+"""
+import argparse
+import asyncio
+import csv
+import io
+import os
+import shutil
+import tempfile
+import time
+import zipfile
+
+workdir = tempfile.mkdtemp(prefix='credential-batch-bench-')
+os.environ.setdefault('BLOB_STORE_DIR', os.path.join(workdir, 'blobs'))
+
+import httpx
+
+import server
+from memory_collection import MemoryCollection
+from repository import BlockRepository, ChainStateRepository, CredentialRepository, UserRepository
+
+
+def build_inputs(items, file_kb):
+    rows, archive = [], io.BytesIO()
+    with zipfile.ZipFile(archive, 'w', zipfile.ZIP_STORED) as z:
+        for i in range(items):
+            name = f'marksheets/student_{i}.pdf'
+            z.writestr(name, f'%PDF-1.4 student {i}\n'.encode() + os.urandom(file_kb * 1024))
+            rows.append({'student_name': f'Student {i}', 'degree': 'B.Tech', 'institution': 'ITM',
+                         'graduation_year': 2025, 'grade': 'A', 'marksheet': name})
+    manifest = io.StringIO()
+    writer = csv.DictWriter(manifest, fieldnames=list(rows[0]))
+    writer.writeheader()
+    writer.writerows(rows)
+    return rows, manifest.getvalue().encode(), archive.getvalue()
+
+
+async def run(args):
+    latency = args.latency_ms / 1000
+    server.users_repo = UserRepository(MemoryCollection(latency))
+    server.credentials_repo = CredentialRepository(MemoryCollection(latency))
+    server.blocks_repo = BlockRepository(MemoryCollection(latency))
+    server.chain_state_repo = ChainStateRepository(MemoryCollection(latency))
+    rows, manifest, archive = build_inputs(args.items, args.file_kb)
+
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://test', timeout=None) as client:
+        await client.post('/api/auth/register', json={"username": "registrar", "email": "registrar@example.com",
+                                                       "password": "bench", "full_name": "Registrar"})
+        login = await client.post('/api/auth/login', data={"username": "registrar", "password": "bench"})
+        headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+        z = zipfile.ZipFile(io.BytesIO(archive))
+        start = time.perf_counter()
+        for row in rows:
+            form = {k: str(v) for k, v in row.items() if k != 'marksheet'}
+            response = await client.post('/api/credentials/issue', data=form, headers=headers,
+                                         files={"marksheet_file": (row['marksheet'], z.read(row['marksheet']))})
+            response.raise_for_status()
+        single = time.perf_counter() - start
+
+        start = time.perf_counter()
+        response = await client.post('/api/credentials/issue/batch', headers=headers, files={
+            "manifest": ("manifest.csv", manifest),
+            "marksheets": ("marksheets.zip", archive),
+        })
+        response.raise_for_status()
+        batch = time.perf_counter() - start
+        result = response.json()
+
+    print(f'{args.items} credentials, {args.file_kb} KB marksheets, {args.latency_ms} ms per query')
+    print(f'{"one request each":<20}{single:>10.2f} s{args.items / single:>12.1f} /s')
+    print(f'{"batch endpoint":<20}{batch:>10.2f} s{args.items / batch:>12.1f} /s'
+          f'   ({result["issued"]} issued, {result["failed"]} failed)')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--items', type=int, default=500)
+    parser.add_argument('--latency-ms', type=float, default=2.0)
+    parser.add_argument('--file-kb', type=int, default=200)
+    args = parser.parse_args()
+    try:
+        asyncio.run(run(args))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""Lookup latency and query plans for the users/credentials queries, without and with indexes.
+
+    python bench_indexes.py [--users 20000] [--credentials 100000] [--mongo-url mongodb://localhost:27017/]
+
+Seeds a throwaway database, runs each query the API issues with only the
+default _id index, then creates the declared indexes (repository.py) and
+runs them again. Needs a running mongod; the database is dropped afterwards.
+"""
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from pymongo import MongoClient
+
+from repository import CREDENTIAL_INDEXES, MONGO_URL, USER_INDEXES
+
+BENCH_DB = 'credential_dapp_index_bench'
+
+
+def seed(db, users, credentials):
+    start = datetime(2024, 1, 1)
+    db['users'].insert_many(
+        {"username": f"user{i}", "email": f"user{i}@example.com", "full_name": f"User {i}",
+         "password_hash": "x", "wallet_address": f"0x{i:040x}", "role": "student",
+         "created_at": (start + timedelta(minutes=i)).isoformat()}
+        for i in range(users)
+    )
+    batch = []
+    for i in range(credentials):
+        batch.append({"owner_username": f"user{random.randrange(users)}", "token_id": i,
+                      "metadata": {"degree": "B.Tech"}, "status": "confirmed",
+                      "created_at": (start + timedelta(seconds=i)).isoformat()})
+        if len(batch) == 10000:
+            db['credentials'].insert_many(batch)
+            batch = []
+    if batch:
+        db['credentials'].insert_many(batch)
+
+
+def queries(db, users):
+    # (label, collection, filter, sort) - the shapes server.py issues
+    user = f"user{random.randrange(users)}"
+    return [
+        ('users by username', db['users'], {"username": user}, None),
+        ('users by email', db['users'], {"email": f"{user}@example.com"}, None),
+        ('credentials by owner', db['credentials'], {"owner_username": user}, [("created_at", -1)]),
+    ]
+
+
+def winning_stages(plan):
+    stages = []
+    while plan:
+        stages.append(plan['stage'] + (f" ({plan['indexName']})" if 'indexName' in plan else ''))
+        plan = plan.get('inputStage')
+    return ' <- '.join(stages)
+
+
+def measure(db, users, repeat):
+    results = {}
+    for i in range(repeat):
+        for label, collection, filter, sort in queries(db, users):
+            cursor = collection.find(filter)
+            if sort:
+                cursor = cursor.sort(sort)
+            start = time.perf_counter()
+            list(cursor)
+            results.setdefault(label, {'times': []})['times'].append(time.perf_counter() - start)
+            if i == 0:
+                cursor = collection.find(filter)
+                explain = (cursor.sort(sort) if sort else cursor).explain()
+                results[label]['plan'] = winning_stages(explain['queryPlanner']['winningPlan'])
+                results[label]['examined'] = explain['executionStats']['totalDocsExamined']
+    return results
+
+
+def report(title, results):
+    print(f'\n{title}')
+    print(f'{"query":<24}{"p50 ms":>10}{"max ms":>10}{"docs examined":>15}  plan')
+    for label, r in results.items():
+        print(f'{label:<24}{statistics.median(r["times"]) * 1000:>10.2f}{max(r["times"]) * 1000:>10.2f}'
+              f'{r["examined"]:>15}  {r["plan"]}')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=20000)
+    parser.add_argument('--credentials', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--mongo-url', default=MONGO_URL)
+    args = parser.parse_args()
+
+    client = MongoClient(args.mongo_url, serverSelectionTimeoutMS=5000)
+    client.drop_database(BENCH_DB)
+    db = client[BENCH_DB]
+    try:
+        random.seed(42)
+        start = time.perf_counter()
+        seed(db, args.users, args.credentials)
+        print(f'Seeded {args.users:,} users and {args.credentials:,} credentials in {time.perf_counter() - start:.1f}s')
+
+        report('Without indexes (collection scans)', measure(db, args.users, args.repeat))
+        db['users'].create_indexes(USER_INDEXES)
+        db['credentials'].create_indexes(CREDENTIAL_INDEXES)
+        report('With declared indexes', measure(db, args.users, args.repeat))
+    finally:
+        client.drop_database(BENCH_DB)
+
+
+if __name__ == '__main__':
+    main()
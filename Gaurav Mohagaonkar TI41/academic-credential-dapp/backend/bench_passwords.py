@@ -0,0 +1,103 @@
+"""Latency of an unrelated endpoint during a burst of logins.
+
+    python bench_passwords.py [--logins 40] [--rounds 12] [--workers 4]
+
+Fires ``--logins`` concurrent logins and, meanwhile, probes the public
+/api/credentials/{id}/verify endpoint one request at a time. Run twice:
+
+* inline - bcrypt is called directly on the event loop (the old behaviour)
+* pool   - bcrypt runs on the PasswordHasher thread pool
+
+Uses the in-process database stand-in, so no mongod is needed.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+from passlib.context import CryptContext
+
+import server
+from memory_collection import MemoryCollection
+from passwords import PasswordHasher
+from repository import BlockRepository, ChainStateRepository, CredentialRepository, UserRepository
+
+
+class InlineHasher(PasswordHasher):
+    async def _run(self, fn, *args):
+        return fn(*args)
+
+
+async def run(mode, args):
+    context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=args.rounds)
+    hasher_class = InlineHasher if mode == 'inline' else PasswordHasher
+    server.password_hasher = hasher_class(workers=args.workers, max_pending=args.logins, context=context)
+    server.users_repo = UserRepository(MemoryCollection())
+    server.credentials_repo = CredentialRepository(MemoryCollection())
+    server.blocks_repo = BlockRepository(MemoryCollection())
+    server.chain_state_repo = ChainStateRepository(MemoryCollection())
+
+    await server.users_repo.create({
+        "username": "bench",
+        "email": "bench@example.com",
+        "full_name": "Bench",
+        "password_hash": context.hash("bench"),
+        "wallet_address": server.generate_wallet_address(),
+    })
+    credential_id = await server.credentials_repo.create({
+        "owner_username": "bench",
+        "owner_wallet": "0x0",
+        "token_id": 1,
+        "transaction_hash": "0x0",
+        "ipfs_cid": "Qm",
+        "metadata": {},
+    })
+
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+        done = asyncio.Event()
+        probes, finished_at = [], []
+
+        async def probe():
+            while not done.is_set():
+                start = time.perf_counter()
+                response = await client.get(f'/api/credentials/{credential_id}/verify')
+                probes.append(time.perf_counter() - start)
+                finished_at.append(time.perf_counter())
+                response.raise_for_status()
+                await asyncio.sleep(0.005)
+
+        async def logins():
+            form = {"username": "bench", "password": "bench"}
+            responses = await asyncio.gather(*(client.post('/api/auth/login', data=form) for _ in range(args.logins)))
+            done.set()
+            return responses
+
+        start = time.perf_counter()
+        responses, _ = await asyncio.gather(logins(), probe())
+        elapsed = time.perf_counter() - start
+
+    assert all(r.status_code == 200 for r in responses), [r.status_code for r in responses]
+    # Longest stretch with no probe answered: how long the loop was unavailable
+    marks = [start] + finished_at + [start + elapsed]
+    stall = max(b - a for a, b in zip(marks, marks[1:]))
+    print(f'{mode:<8}{args.logins / elapsed:>12.1f}{len(probes):>8}{statistics.median(probes) * 1000:>12.1f}'
+          f'{stall * 1000:>12.1f}')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--logins', type=int, default=40)
+    parser.add_argument('--rounds', type=int, default=12)
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    print(f'{args.logins} concurrent logins, bcrypt rounds={args.rounds}, {args.workers} workers')
+    print(f'{"mode":<8}{"logins/s":>12}{"probes":>8}{"probe p50":>12}{"stall ms":>12}')
+    for mode in ('inline', 'pool'):
+        asyncio.run(run(mode, args))
+
+
+if __name__ == '__main__':
+    main()
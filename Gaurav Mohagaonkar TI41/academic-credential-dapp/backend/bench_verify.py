@@ -0,0 +1,120 @@
+"""Requests/sec for public credential verification.
+
+    python bench_verify.py [--credentials 500] [--requests 2000] [--batch 200] [--latency-ms 2]
+
+Issues ``--credentials`` credentials in-process against the database stand-in
+(``--latency-ms`` per query), then measures:
+
+  single uncached   GET .../verify with the verification cache cleared each time
+  single cached     GET .../verify served from the verification cache
+  single 304        the same with If-None-Match, as a caching proxy or browser sends
+  batch             POST /api/credentials/verify/batch with ``--batch`` ids per call
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+
+workdir = tempfile.mkdtemp(prefix='credential-verify-bench-')
+os.environ.setdefault('BLOB_STORE_DIR', os.path.join(workdir, 'blobs'))
+
+import httpx
+
+import server
+from memory_collection import MemoryCollection
+from repository import BlockRepository, ChainStateRepository, CredentialRepository, UserRepository
+
+
+async def timed(label, count, unit, make_call):
+    start = time.perf_counter()
+    for i in range(count):
+        response = await make_call(i)
+        assert response.status_code in (200, 304), response.text
+    elapsed = time.perf_counter() - start
+    print(f'{label:<18}{count:>8} req{count / elapsed:>12.1f} req/s{unit * count / elapsed:>12.1f} credentials/s')
+
+
+async def run(args):
+    latency = args.latency_ms / 1000
+    server.users_repo = UserRepository(MemoryCollection(latency))
+    credentials = server.credentials_repo = CredentialRepository(MemoryCollection(latency))
+    server.blocks_repo = BlockRepository(MemoryCollection(latency))
+    server.chain_state_repo = ChainStateRepository(MemoryCollection(latency))
+
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://test', timeout=None) as client:
+        await client.post('/api/auth/register', json={"username": "registrar", "email": "registrar@example.com",
+                                                       "password": "bench", "full_name": "Registrar"})
+        login = await client.post('/api/auth/login', data={"username": "registrar", "password": "bench"})
+        headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+        ids = []
+        for i in range(args.credentials):
+            response = await client.post('/api/credentials/issue', headers=headers, data={
+                "student_name": f"Student {i}", "degree": "B.Tech", "institution": "ITM",
+                "graduation_year": "2025", "grade": "A"},
+                files={"marksheet_file": (f"student_{i}.pdf", f"%PDF-1.4 student {i}".encode())})
+            response.raise_for_status()
+            ids.append(response.json()["credential_id"])
+        # The sealer task only runs under the app's lifespan; seal the last block as it would
+        server.blockchain_service.seal_open_block()
+        await server.save_blocks()
+
+        print(f'{args.credentials} credentials, {args.latency_ms} ms per query')
+        queries = credentials.collection.queries
+
+        async def uncached(i):
+            server.verify_cache.clear()
+            return await client.get(f'/api/credentials/{ids[i % len(ids)]}/verify')
+        await timed('single uncached', args.requests, 1, uncached)
+
+        etags = {}
+        for credential_id in ids:
+            etags[credential_id] = (await client.get(f'/api/credentials/{credential_id}/verify')).headers['etag']
+
+        async def cached(i):
+            return await client.get(f'/api/credentials/{ids[i % len(ids)]}/verify')
+        await timed('single cached', args.requests, 1, cached)
+
+        async def not_modified(i):
+            credential_id = ids[i % len(ids)]
+            return await client.get(f'/api/credentials/{credential_id}/verify',
+                                    headers={"If-None-Match": etags[credential_id]})
+        await timed('single 304', args.requests, 1, not_modified)
+
+        batches = max(1, args.requests // args.batch)
+
+        async def batch(i):
+            server.verify_cache.clear()
+            start = (i * args.batch) % len(ids)
+            chunk = (ids * 2)[start:start + args.batch]
+            return await client.post('/api/credentials/verify/batch', json={"credential_ids": chunk})
+        await timed('batch uncached', batches, args.batch, batch)
+
+        async def batch_cached(i):
+            start = (i * args.batch) % len(ids)
+            chunk = (ids * 2)[start:start + args.batch]
+            return await client.post('/api/credentials/verify/batch', json={"credential_ids": chunk})
+        await timed('batch cached', batches, args.batch, batch_cached)
+
+        print(f'{credentials.collection.queries - queries} credential queries in total')
+        print(f'verify cache: {server.verify_cache.stats()}')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--credentials', type=int, default=500)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--batch', type=int, default=200)
+    parser.add_argument('--latency-ms', type=float, default=2.0)
+    args = parser.parse_args()
+    try:
+        asyncio.run(run(args))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+from datetime import datetime
+from typing import Optional
+import hashlib
+import json
+import mmap
+import os
+import re
+import threading
+import uuid
+
+BLOB_STORE_DIR = os.environ.get('BLOB_STORE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'blob_store'))
+CID_RE = re.compile(r'^Qm[0-9a-f]{44}$')
+
+
+def cid_for_digest(digest: str) -> str:
+    # Same CID format the mock IPFS service always returned
+    return f"Qm{digest[:44]}"
+
+
+class BlobWriter:
+    """Streams one upload to a temporary file, hashing it as the bytes arrive."""
+
+    def __init__(self, store):
+        self.store = store
+        self.digest = hashlib.sha256()
+        self.size = 0
+        os.makedirs(store.root, exist_ok=True)
+        self.tmp_path = os.path.join(store.root, f"upload-{uuid.uuid4().hex}.tmp")
+        self.file = open(self.tmp_path, 'wb')
+
+    def write(self, chunk: bytes):
+        self.digest.update(chunk)
+        self.file.write(chunk)
+        self.size += len(chunk)
+
+    def commit(self, filename: str) -> str:
+        self.file.close()
+        cid = cid_for_digest(self.digest.hexdigest())
+        path = self.store.path_for(cid)
+        deduplicated = os.path.exists(path)
+        if deduplicated:
+            os.remove(self.tmp_path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(self.tmp_path, path)
+        self.store._count(deduplicated, self.size)
+        self.store._write_meta(cid, filename, self.size)
+        return cid
+
+    def abort(self):
+        self.file.close()
+        try:
+            os.remove(self.tmp_path)
+        except FileNotFoundError:
+            pass
+
+
+class BlobStore:
+    """Content-addressed marksheet storage on local disk.
+
+    Raw bytes live at ``<root>/<shard>/<shard>/<cid>`` next to a small JSON
+    sidecar with the original filename and upload time. Identical content maps
+    to the same CID and is written only once, and reads memory-map the file
+    rather than copying it into Python objects.
+    """
+
+    def __init__(self, root: str = BLOB_STORE_DIR):
+        self.root = root
+        self.uploads = 0
+        self.deduplicated = 0
+        self.bytes_written = 0
+        # Writers commit from threadpool threads
+        self._lock = threading.Lock()
+
+    def _count(self, deduplicated: bool, size: int):
+        with self._lock:
+            self.uploads += 1
+            if deduplicated:
+                self.deduplicated += 1
+            else:
+                self.bytes_written += size
+
+    def path_for(self, cid: str) -> str:
+        return os.path.join(self.root, cid[2:4], cid[4:6], cid)
+
+    def writer(self) -> BlobWriter:
+        return BlobWriter(self)
+
+    def upload_file(self, file_content: bytes, filename: str) -> str:
+        writer = self.writer()
+        try:
+            writer.write(file_content)
+            return writer.commit(filename)
+        except BaseException:
+            writer.abort()
+            raise
+
+    def _write_meta(self, cid: str, filename: str, size: int):
+        meta_path = f"{self.path_for(cid)}.json"
+        meta = self._read_meta(cid)
+        if meta is not None and meta['filename'] == filename:
+            return
+        tmp_path = f"{meta_path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'filename': filename, 'size': size, 'uploaded_at': datetime.utcnow().isoformat()}, f)
+        os.replace(tmp_path, meta_path)
+
+    def _read_meta(self, cid: str) -> Optional[dict]:
+        try:
+            with open(f"{self.path_for(cid)}.json", encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def get_file(self, cid: str) -> Optional[dict]:
+        if not CID_RE.match(cid or ''):
+            return None
+        meta = self._read_meta(cid)
+        path = self.path_for(cid)
+        if meta is None or not os.path.exists(path):
+            return None
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            # The mapping stays valid after the file is closed; an empty file cannot be mapped
+            content = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)) if size else b''
+        return {**meta, 'cid': cid, 'content': content, 'size': size, 'path': path}
+
+    def stats(self) -> dict:
+        return {
+            'root': self.root,
+            'uploads': self.uploads,
+            'deduplicated': self.deduplicated,
+            'bytes_written': self.bytes_written,
+        }
@@ -0,0 +1,266 @@
+from collections import deque
+from typing import Iterable, List, Optional, Tuple
+import hashlib
+import os
+import time
+
+CHAIN_BLOCK_SIZE = int(os.environ.get('CHAIN_BLOCK_SIZE', 64))
+CHAIN_BLOCK_INTERVAL_SECONDS = float(os.environ.get('CHAIN_BLOCK_INTERVAL_SECONDS', 5))
+NETWORK = 'Sepolia Testnet (Simulated)'
+# Numbering starts after these, as the original in-memory counters did
+TOKEN_ID_FLOOR = 1000
+BLOCK_NUMBER_FLOOR = 5000000
+
+
+def _sha256(data: bytes) -> bytes:
+    return hashlib.sha256(data).digest()
+
+
+def leaf_hash(token_id: int, to_address: str, token_uri: str) -> str:
+    """Hash committed for one credential; anyone holding the credential can recompute it."""
+    return _sha256(f"{token_id}:{to_address}:{token_uri}".encode()).hex()
+
+
+def merkle_levels(leaves: List[str]) -> List[List[bytes]]:
+    # levels[0] are the leaves, levels[-1] is [root]; an odd node is paired with itself
+    level = [bytes.fromhex(leaf) for leaf in leaves]
+    levels = [level]
+    while len(level) > 1:
+        if len(level) % 2:
+            level = level + [level[-1]]
+        level = [_sha256(level[i] + level[i + 1]) for i in range(0, len(level), 2)]
+        levels.append(level)
+    return levels
+
+
+def merkle_proof(levels: List[List[bytes]], index: int) -> List[dict]:
+    proof = []
+    for level in levels[:-1]:
+        sibling = index ^ 1
+        sibling_hash = level[sibling] if sibling < len(level) else level[index]
+        proof.append({'hash': sibling_hash.hex(), 'position': 'left' if sibling < index else 'right'})
+        index //= 2
+    return proof
+
+
+def verify_proof(leaf: str, proof: List[dict], root: str) -> bool:
+    """Check an inclusion proof offline: no chain or service state needed."""
+    node = bytes.fromhex(leaf)
+    for step in proof:
+        sibling = bytes.fromhex(step['hash'])
+        node = _sha256(sibling + node) if step['position'] == 'left' else _sha256(node + sibling)
+    return node.hex() == root
+
+
+class Block:
+    def __init__(self, number: int):
+        self.number = number
+        self.opened_at = time.monotonic()
+        self.leaves = []
+        self.token_ids = []
+        self.levels = None
+        self.root = None
+        self.anchor_transaction = None
+        self.sealed_at = None
+
+    def seal(self):
+        self.levels = merkle_levels(self.leaves)
+        self.root = self.levels[-1][0].hex()
+        self.anchor()
+        self.sealed_at = time.time()
+
+    def anchor(self):
+        # On a real chain this is the single transaction that anchors the whole block
+        self.anchor_transaction = '0x' + hashlib.sha256(f"{self.number}:{self.root}".encode()).hexdigest()
+
+    def to_document(self) -> dict:
+        return {
+            '_id': self.number,
+            'leaves': self.leaves,
+            'token_ids': self.token_ids,
+            'max_token_id': max(self.token_ids),
+            'root': self.root,
+            'anchor_transaction': self.anchor_transaction,
+            'sealed_at': self.sealed_at,
+        }
+
+    @classmethod
+    def from_document(cls, document: dict) -> 'Block':
+        block = cls(document['_id'])
+        block.leaves = list(document['leaves'])
+        block.token_ids = list(document['token_ids'])
+        # The tree is rebuilt from the leaves; the stored root is what it must match
+        block.levels = merkle_levels(block.leaves)
+        block.root = document['root']
+        block.anchor_transaction = document['anchor_transaction']
+        block.sealed_at = document['sealed_at']
+        return block
+
+
+# Mock Blockchain Service
+class MockBlockchainService:
+    """Simulated chain that batches mints into blocks committed by a Merkle root.
+
+    Mints join the open block, which is sealed when it holds ``block_size``
+    credentials or is ``block_interval`` seconds old. A real deployment would
+    then pay for one anchor transaction per block instead of one per
+    credential, and every credential still gets its own O(log n) proof.
+
+    The service itself keeps state in memory only. Token ids and block
+    numbers are handed to it with ``reserve`` from counters shared between
+    workers (``shortfall`` says how many a mint needs). Sealed blocks are
+    queued for the caller to persist (``take_unsaved``), and blocks sealed
+    elsewhere are added back with ``load_block``.
+    """
+
+    def __init__(self, block_size=CHAIN_BLOCK_SIZE, block_interval=CHAIN_BLOCK_INTERVAL_SECONDS):
+        self.block_size = block_size
+        self.block_interval = block_interval
+        self.free_token_ids = deque()
+        self.free_block_numbers = deque()
+        self.blocks = {}
+        self.tokens = {}
+        # leaf hash -> (block number, index); token ids issued before blocks were persisted can repeat
+        self.leaves = {}
+        self.unsaved = []
+        self.open_block = None
+
+    def shortfall(self, token_ids: int, mints: int) -> Tuple[int, int]:
+        # Token ids and block numbers still to reserve before ``mints`` mints; one
+        # spare block number covers an open block that fills or expires meanwhile
+        blocks = -(-mints // self.block_size) + 1 if mints else 0
+        return (max(0, token_ids - len(self.free_token_ids)),
+                max(0, blocks - len(self.free_block_numbers)))
+
+    def reserve(self, token_ids: Iterable[int], block_numbers: Iterable[int]):
+        self.free_token_ids.extend(token_ids)
+        self.free_block_numbers.extend(block_numbers)
+
+    def knows(self, leaf: str) -> bool:
+        return leaf in self.leaves
+
+    def load_block(self, block: Block):
+        if block.number in self.blocks:
+            return
+        self.blocks[block.number] = block
+        for index, (token_id, leaf) in enumerate(zip(block.token_ids, block.leaves)):
+            self.tokens[token_id] = self.leaves[leaf] = (block.number, index)
+
+    def take_unsaved(self) -> List[Block]:
+        blocks, self.unsaved = self.unsaved, []
+        return blocks
+
+    def renumber(self, block: Block, number: int):
+        # A sealed block whose number another worker saved first moves to a fresh one
+        if self.blocks.get(block.number) is block:
+            del self.blocks[block.number]
+        block.number = number
+        block.anchor()
+        self.blocks[number] = block
+        for index, (token_id, leaf) in enumerate(zip(block.token_ids, block.leaves)):
+            self.tokens[token_id] = self.leaves[leaf] = (number, index)
+
+    def _append(self, block: Block, token_id: int, leaf: str):
+        self.tokens[token_id] = self.leaves[leaf] = (block.number, len(block.leaves))
+        block.leaves.append(leaf)
+        block.token_ids.append(token_id)
+
+    def _block_for_mint(self) -> Block:
+        if self.open_block is not None and (len(self.open_block.leaves) >= self.block_size or self._expired(self.open_block)):
+            self.seal_open_block()
+        if self.open_block is None:
+            number = self._take(self.free_block_numbers, 'block numbers')
+            self.open_block = self.blocks[number] = Block(number)
+        return self.open_block
+
+    @staticmethod
+    def _take(free: deque, what: str) -> int:
+        if not free:
+            raise RuntimeError(f'no {what} reserved; call reserve() before minting')
+        return free.popleft()
+
+    def _expired(self, block: Block) -> bool:
+        return time.monotonic() - block.opened_at >= self.block_interval
+
+    def seal_open_block(self) -> Optional[Block]:
+        block, self.open_block = self.open_block, None
+        if block is not None:
+            block.seal()
+            self.unsaved.append(block)
+        return block
+
+    def seal_expired(self) -> Optional[Block]:
+        # Called periodically so a quiet period does not leave mints unsealed
+        if self.open_block is not None and self._expired(self.open_block):
+            return self.seal_open_block()
+        return None
+
+    def mint_nft(self, to_address: str, token_uri: str) -> dict:
+        block = self._block_for_mint()
+        token_id = self._take(self.free_token_ids, 'token ids')
+        leaf = leaf_hash(token_id, to_address, token_uri)
+        self._append(block, token_id, leaf)
+
+        return {
+            'transaction_hash': '0x' + leaf,
+            'token_id': token_id,
+            'block_number': block.number,
+            'from': '0x0000000000000000000000000000000000000000',
+            'to': to_address,
+            'gas_used': 150000,
+            'status': 'success',
+            'network': NETWORK
+        }
+
+    def mint_batch(self, to_address: str, token_uris: List[str]) -> List[dict]:
+        return [self.mint_nft(to_address, token_uri) for token_uri in token_uris]
+
+    def anchor_existing(self, token_id: int, to_address: str, token_uri: str) -> bool:
+        # Commits a credential issued without a saved block, keeping its token id
+        leaf = leaf_hash(token_id, to_address, token_uri)
+        if leaf in self.leaves:
+            return False
+        self._append(self._block_for_mint(), token_id, leaf)
+        return True
+
+    def verify_token(self, token_id: int, to_address: Optional[str] = None, token_uri: Optional[str] = None) -> dict:
+        leaf = leaf_hash(token_id, to_address, token_uri) if to_address is not None and token_uri is not None else None
+        location = self.leaves.get(leaf) or self.tokens.get(token_id)
+        if location is None:
+            return {'token_id': token_id, 'exists': False, 'verified': False, 'status': 'unknown', 'network': NETWORK}
+
+        block_number, index = location
+        block = self.blocks[block_number]
+        if block.root is None:
+            # Still in the open block: there is no root to prove against until the sealer runs
+            return {'token_id': token_id, 'exists': True, 'verified': False, 'status': 'pending',
+                    'network': NETWORK, 'block_number': block_number}
+
+        leaf = block.leaves[index]
+        proof = merkle_proof(block.levels, index)
+        # With the credential's owner and URI, check they are what was committed
+        matches = to_address is None or token_uri is None or leaf_hash(token_id, to_address, token_uri) == leaf
+        return {
+            'token_id': token_id,
+            'exists': True,
+            'verified': matches and verify_proof(leaf, proof, block.root),
+            'status': 'sealed',
+            'network': NETWORK,
+            'block_number': block_number,
+            'merkle_root': block.root,
+            'anchor_transaction': block.anchor_transaction,
+            'leaf_hash': leaf,
+            'proof': proof,
+        }
+
+    def stats(self) -> dict:
+        sealed = [b for b in self.blocks.values() if b.root is not None]
+        return {
+            'block_size': self.block_size,
+            'block_interval_seconds': self.block_interval,
+            'tokens': len(self.tokens),
+            'sealed_blocks': len(sealed),
+            'open_block_size': len(self.open_block.leaves) if self.open_block is not None else 0,
+            'unsaved_blocks': len(self.unsaved),
+            'tokens_per_anchor': round(sum(len(b.leaves) for b in sealed) / len(sealed), 2) if sealed else 0.0,
+        }
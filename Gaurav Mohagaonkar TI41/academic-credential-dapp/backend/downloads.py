@@ -0,0 +1,91 @@
+from fastapi import Request
+from fastapi.responses import Response, StreamingResponse
+from typing import Optional, Tuple
+import os
+import re
+
+DOWNLOAD_CHUNK_SIZE = int(os.environ.get('DOWNLOAD_CHUNK_SIZE', 256 * 1024))
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Inclusive (start, end) for a single ``bytes=`` range, None to send the whole file.
+
+    Raises ValueError for a range that cannot be satisfied. Multiple ranges are
+    not supported and, as RFC 9110 allows, get the full content instead.
+    """
+    if not header:
+        return None
+    match = RANGE_RE.match(header.strip())
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError(header)
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    return etag in [tag.strip().removeprefix('W/') for tag in header.split(',')]
+
+
+def iter_blob(content, start: int, end: int):
+    # Slices of the memory-mapped file; nothing is copied until the server writes it out
+    view = memoryview(content)
+    for offset in range(start, end + 1, DOWNLOAD_CHUNK_SIZE):
+        yield view[offset:min(offset + DOWNLOAD_CHUNK_SIZE, end + 1)]
+
+
+def blob_response(request: Request, file_data: dict) -> Response:
+    """Stream a stored blob with ETag, conditional GET and single-range support."""
+    size = file_data["size"]
+    # Content-addressed, so the CID is a strong validator
+    etag = f'"{file_data["cid"]}"'
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        # The route needs a bearer token, so only the client may cache; revalidation is a cheap 304
+        "Cache-Control": "private, no-cache",
+        "Content-Disposition": f'attachment; filename="{file_data["filename"]}"',
+    }
+
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if if_range is not None and if_range.strip() != etag:
+        range_header = None
+
+    try:
+        byte_range = parse_range(range_header, size)
+    except ValueError:
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+
+    if byte_range is None:
+        start, end, status_code = 0, size - 1, 200
+    else:
+        (start, end), status_code = byte_range, 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1 if size else 0)
+
+    return StreamingResponse(
+        iter_blob(file_data["content"], start, end) if size else iter(()),
+        status_code=status_code,
+        media_type="application/octet-stream",
+        headers=headers,
+    )
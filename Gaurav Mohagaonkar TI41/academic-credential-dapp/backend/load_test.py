@@ -0,0 +1,140 @@
+"""Concurrent load test for the authenticated read endpoints.
+
+    python load_test.py [--requests 500] [--concurrency 50] [--latency-ms 5]
+    python load_test.py --mongo-url mongodb://localhost:27017/
+
+Runs the app in-process (httpx ASGI transport, no network) and fires
+``--requests`` calls at /api/auth/me and /api/credentials/list with
+``--concurrency`` in flight, once in each of three modes:
+
+* blocking - the database is called synchronously from the event loop, as
+  the handlers did with pymongo before the repository layer
+* async    - the database is awaited through the repositories (Motor)
+* cached   - as async, with the user cache in front of get_current_user
+
+Without ``--mongo-url`` an in-process stand-in with ``--latency-ms`` of
+simulated round-trip time is used; with it, pymongo and Motor talk to a
+real mongod using a throwaway database.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime, timedelta
+
+import httpx
+
+import server
+from memory_collection import BlockingCollection, MemoryCollection
+from repository import CredentialRepository, UserRepository, create_client
+from ttl_cache import TTLCache, USER_CACHE_MAX_ENTRIES, USER_CACHE_TTL_SECONDS
+
+LOAD_TEST_DB = 'credential_dapp_load_test'
+ENDPOINTS = ['/api/auth/me', '/api/credentials/list']
+
+
+def memory_collections(latency, blocking):
+    return MemoryCollection(latency, blocking), MemoryCollection(latency, blocking)
+
+
+def mongo_collections(mongo_url, blocking):
+    if blocking:
+        from pymongo import MongoClient
+        db = MongoClient(mongo_url)[LOAD_TEST_DB]
+        return BlockingCollection(db['users']), BlockingCollection(db['credentials'])
+    db = create_client(mongo_url)[LOAD_TEST_DB]
+    return db['users'], db['credentials']
+
+
+def db_queries(*collections):
+    # Only the in-process stand-in counts its round trips
+    if not all(isinstance(c, MemoryCollection) for c in collections):
+        return None
+    return sum(c.queries for c in collections)
+
+
+async def seed(users, credentials, credential_count):
+    await users.create({
+        "username": "loadtest",
+        "email": "loadtest@example.com",
+        "full_name": "Load Test",
+        "password_hash": await server.hash_password("loadtest"),
+        "wallet_address": server.generate_wallet_address(),
+        "role": "student",
+    })
+    issued = datetime.utcnow()
+    for i in range(credential_count):
+        await credentials.create({
+            "owner_username": "loadtest",
+            "token_id": i,
+            # Same shape as issued credentials, so the list sorts on real keys
+            "created_at": (issued - timedelta(seconds=i)).isoformat(),
+            "metadata": {"student_name": "Load Test", "degree": f"Degree {i}"},
+            "status": "confirmed",
+        })
+
+
+async def fire(total, concurrency):
+    token = server.create_access_token({"sub": "loadtest"})
+    headers = {"Authorization": f"Bearer {token}"}
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(client, i):
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.get(ENDPOINTS[i % len(ENDPOINTS)], headers=headers)
+            latencies.append(time.perf_counter() - start)
+            response.raise_for_status()
+
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(one(client, i) for i in range(total)))
+        elapsed = time.perf_counter() - start
+    return elapsed, latencies
+
+
+async def run(mode, args):
+    blocking = mode == 'blocking'
+    if args.mongo_url:
+        users, credentials = mongo_collections(args.mongo_url, blocking)
+    else:
+        users, credentials = memory_collections(args.latency_ms / 1000, blocking)
+    cache = TTLCache(USER_CACHE_TTL_SECONDS, USER_CACHE_MAX_ENTRIES) if mode == 'cached' else None
+    server.users_repo = UserRepository(users, cache=cache)
+    server.credentials_repo = CredentialRepository(credentials)
+
+    if args.mongo_url:
+        await create_client(args.mongo_url).drop_database(LOAD_TEST_DB)
+    await seed(server.users_repo, server.credentials_repo, args.credentials)
+
+    seeded = db_queries(users, credentials)
+    elapsed, latencies = await fire(args.requests, args.concurrency)
+    queries = db_queries(users, credentials)
+    queries = f'{(queries - seeded) / args.requests:.2f}' if queries is not None else '-'
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    hit_rate = f'{cache.stats()["hit_rate"]:.1%}' if cache is not None else '-'
+    print(f'{mode:<10}{args.requests / elapsed:>12.1f}{statistics.median(latencies) * 1000:>12.1f}{p95 * 1000:>12.1f}'
+          f'{hit_rate:>12}{queries:>12}')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--latency-ms', type=float, default=5.0, help='simulated round trip of the in-process stand-in')
+    parser.add_argument('--credentials', type=int, default=20, help='credentials owned by the test user')
+    parser.add_argument('--mongo-url', help='test against this mongod instead of the in-process stand-in')
+    args = parser.parse_args()
+
+    backend = args.mongo_url or f'in-process stand-in, {args.latency_ms} ms per query'
+    print(f'{args.requests} requests, {args.concurrency} concurrent ({backend})')
+    print(f'{"mode":<10}{"req/s":>12}{"p50 ms":>12}{"p95 ms":>12}{"user hits":>12}{"db/request":>12}')
+    for mode in ('blocking', 'async', 'cached'):
+        asyncio.run(run(mode, args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,232 @@
+"""In-process stand-ins for a MongoDB collection, used by the load tests.
+
+``MemoryCollection`` speaks the subset of the Motor API the repositories use.
+Each call waits ``latency`` seconds to model a database round trip: with
+``blocking=True`` it waits with ``time.sleep`` and so stalls the event loop
+like a synchronous pymongo call inside an ``async def`` handler would.
+"""
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+import asyncio
+import copy
+import time
+
+
+class InsertOneResult:
+    def __init__(self, inserted_id):
+        self.inserted_id = inserted_id
+
+
+class InsertManyResult:
+    def __init__(self, inserted_ids):
+        self.inserted_ids = inserted_ids
+
+
+class UpdateResult:
+    def __init__(self, matched_count):
+        self.matched_count = matched_count
+
+
+def _get(document, path):
+    for key in path.split('.'):
+        if not isinstance(document, dict):
+            return None
+        document = document.get(key)
+    return document
+
+
+def _compare(value, condition):
+    if isinstance(value, list):
+        # As in Mongo, a condition on an array field matches if any element does
+        return value == condition or any(_compare(v, condition) for v in value)
+    if not isinstance(condition, dict):
+        return value == condition
+    for op, operand in condition.items():
+        if op == '$lt' and not (value is not None and value < operand):
+            return False
+        if op == '$gt' and not (value is not None and value > operand):
+            return False
+        if op == '$in' and value not in operand:
+            return False
+    return True
+
+
+def matches(document, filter):
+    for key, condition in filter.items():
+        if key == '$or':
+            if not any(matches(document, f) for f in condition):
+                return False
+        elif not _compare(_get(document, key), condition):
+            return False
+    return True
+
+
+def apply_update(document, update):
+    document.update(copy.deepcopy(update.get("$set", {})))
+    for key, amount in update.get("$inc", {}).items():
+        document[key] = document.get(key, 0) + amount
+    for key, value in update.get("$max", {}).items():
+        if document.get(key) is None or value > document[key]:
+            document[key] = value
+
+
+def project(document, projection):
+    if not projection:
+        return copy.deepcopy(document)
+    result = {"_id": document["_id"]} if projection.get("_id", 1) else {}
+    for path, include in projection.items():
+        value = _get(document, path)
+        if not include or path == "_id" or value is None:
+            continue
+        target = result
+        *parents, leaf = path.split('.')
+        for key in parents:
+            target = target.setdefault(key, {})
+        target[leaf] = copy.deepcopy(value)
+    return result
+
+
+class MemoryCursor:
+    def __init__(self, collection, documents, projection=None):
+        self.collection = collection
+        self.documents = documents
+        self.projection = projection
+        self._limit = 0
+
+    def sort(self, keys):
+        # Stable sorts from the last key to the first give a compound order;
+        # missing/None values sort lowest, as in Mongo
+        for key, direction in reversed(keys):
+            self.documents = sorted(self.documents, key=lambda d: (_get(d, key) is not None, _get(d, key)),
+                                    reverse=direction < 0)
+        return self
+
+    def limit(self, count):
+        self._limit = count
+        return self
+
+    async def to_list(self, length=None):
+        await self.collection._wait()
+        documents = self.documents[:self._limit] if self._limit else self.documents
+        documents = documents if length is None else documents[:length]
+        return [project(d, self.projection) for d in documents]
+
+
+class MemoryCollection:
+    def __init__(self, latency: float = 0.0, blocking: bool = False):
+        self.latency = latency
+        self.blocking = blocking
+        self.documents = []
+        self.queries = 0
+
+    async def _wait(self):
+        self.queries += 1
+        if self.blocking:
+            time.sleep(self.latency)
+        elif self.latency:
+            await asyncio.sleep(self.latency)
+
+    async def find_one(self, filter, projection=None):
+        await self._wait()
+        for document in self.documents:
+            if matches(document, filter):
+                return project(document, projection)
+        return None
+
+    def find(self, filter, projection=None):
+        return MemoryCursor(self, [d for d in self.documents if matches(d, filter)], projection)
+
+    async def count_documents(self, filter, limit=0):
+        await self._wait()
+        count = sum(1 for d in self.documents if matches(d, filter))
+        return min(count, limit) if limit else count
+
+    async def insert_one(self, document):
+        await self._wait()
+        document.setdefault("_id", ObjectId())
+        if any(d["_id"] == document["_id"] for d in self.documents):
+            raise DuplicateKeyError(f"duplicate _id {document['_id']!r}")
+        self.documents.append(copy.deepcopy(document))
+        return InsertOneResult(document["_id"])
+
+    async def insert_many(self, documents, ordered=True):
+        # One round trip for the whole batch, like the real driver
+        await self._wait()
+        for document in documents:
+            document.setdefault("_id", ObjectId())
+            self.documents.append(copy.deepcopy(document))
+        return InsertManyResult([d["_id"] for d in documents])
+
+    async def update_one(self, filter, update, upsert=False):
+        await self._wait()
+        return UpdateResult(0 if self._update(filter, update, upsert) is None else 1)
+
+    async def find_one_and_update(self, filter, update, upsert=False, return_document=ReturnDocument.BEFORE):
+        # Applied without yielding to the event loop, so it is atomic like the server-side operation
+        await self._wait()
+        before = next((copy.deepcopy(d) for d in self.documents if matches(d, filter)), None)
+        after = self._update(filter, update, upsert)
+        return copy.deepcopy(after) if return_document == ReturnDocument.AFTER else before
+
+    def _update(self, filter, update, upsert):
+        for document in self.documents:
+            if matches(document, filter):
+                apply_update(document, update)
+                return document
+        if not upsert:
+            return None
+        # An upsert starts from the filter's equality fields
+        document = {k: v for k, v in filter.items() if not isinstance(v, dict) and not k.startswith("$")}
+        document.setdefault("_id", ObjectId())
+        apply_update(document, update)
+        self.documents.append(document)
+        return document
+
+
+class BlockingCollection:
+    """Async facade over a synchronous pymongo collection, called inline.
+
+    This is how the handlers used the database before the repository layer,
+    and is the baseline the load test compares Motor against.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def find_one(self, filter, projection=None):
+        return self.collection.find_one(filter, projection)
+
+    def find(self, filter, projection=None):
+        return BlockingCursor(self.collection.find(filter, projection))
+
+    async def count_documents(self, filter, limit=0):
+        return self.collection.count_documents(filter, limit=limit) if limit else self.collection.count_documents(filter)
+
+    async def insert_one(self, document):
+        return self.collection.insert_one(document)
+
+    async def insert_many(self, documents, ordered=True):
+        return self.collection.insert_many(documents, ordered=ordered)
+
+    async def update_one(self, filter, update, upsert=False):
+        return self.collection.update_one(filter, update, upsert=upsert)
+
+    async def find_one_and_update(self, filter, update, upsert=False, return_document=ReturnDocument.BEFORE):
+        return self.collection.find_one_and_update(filter, update, upsert=upsert, return_document=return_document)
+
+
+class BlockingCursor:
+    def __init__(self, cursor):
+        self.cursor = cursor
+
+    def sort(self, keys):
+        self.cursor = self.cursor.sort(keys)
+        return self
+
+    def limit(self, count):
+        self.cursor = self.cursor.limit(count)
+        return self
+
+    async def to_list(self, length=None):
+        return list(self.cursor if length is None else self.cursor.limit(length))
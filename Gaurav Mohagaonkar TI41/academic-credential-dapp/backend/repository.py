@@ -0,0 +1,281 @@
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, IndexModel, ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from bson import ObjectId
+from bson.errors import InvalidId
+from typing import Optional, List, Tuple
+import base64
+import json
+import os
+
+# MongoDB connection pool configuration
+MONGO_URL = os.environ.get('MONGO_URL', 'mongodb://localhost:27017/')
+MONGO_DB_NAME = os.environ.get('MONGO_DB_NAME', 'credential_dapp')
+MONGO_MAX_POOL_SIZE = int(os.environ.get('MONGO_MAX_POOL_SIZE', 100))
+MONGO_MIN_POOL_SIZE = int(os.environ.get('MONGO_MIN_POOL_SIZE', 0))
+MONGO_MAX_IDLE_TIME_MS = int(os.environ.get('MONGO_MAX_IDLE_TIME_MS', 60000))
+MONGO_CONNECT_TIMEOUT_MS = int(os.environ.get('MONGO_CONNECT_TIMEOUT_MS', 5000))
+MONGO_SOCKET_TIMEOUT_MS = int(os.environ.get('MONGO_SOCKET_TIMEOUT_MS', 10000))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', 5000))
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.environ.get('MONGO_WAIT_QUEUE_TIMEOUT_MS', 5000))
+
+
+def create_client(url: str = MONGO_URL) -> AsyncIOMotorClient:
+    # Motor connects lazily, so creating the client does no I/O
+    return AsyncIOMotorClient(
+        url,
+        maxPoolSize=MONGO_MAX_POOL_SIZE,
+        minPoolSize=MONGO_MIN_POOL_SIZE,
+        maxIdleTimeMS=MONGO_MAX_IDLE_TIME_MS,
+        connectTimeoutMS=MONGO_CONNECT_TIMEOUT_MS,
+        socketTimeoutMS=MONGO_SOCKET_TIMEOUT_MS,
+        serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        waitQueueTimeoutMS=MONGO_WAIT_QUEUE_TIMEOUT_MS,
+    )
+
+
+# Indexes every query in server.py relies on; _id is indexed by MongoDB itself
+USER_INDEXES = [
+    IndexModel([("username", ASCENDING)], name="username_unique", unique=True),
+    IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+]
+CREDENTIAL_INDEXES = [
+    # Covers the keyset-paginated listing: owner match, then newest first with _id as tie-breaker
+    IndexModel([("owner_username", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+               name="owner_created_at_id"),
+    # Highest issued token id at startup
+    IndexModel([("token_id", DESCENDING)], name="token_id"),
+]
+BLOCK_INDEXES = [
+    # Verification looks a credential's block up by its leaf hash
+    IndexModel([("leaves", ASCENDING)], name="leaves"),
+    IndexModel([("max_token_id", DESCENDING)], name="max_token_id"),
+]
+
+# Fields the credential list needs for its cards; "full" returns whole documents
+CREDENTIAL_SUMMARY_PROJECTION = {
+    "token_id": 1,
+    "transaction_hash": 1,
+    "block_number": 1,
+    "ipfs_cid": 1,
+    "status": 1,
+    "created_at": 1,
+    "metadata.student_name": 1,
+    "metadata.degree": 1,
+    "metadata.institution": 1,
+    "metadata.graduation_year": 1,
+    "metadata.grade": 1,
+}
+LIST_SORT = [("created_at", DESCENDING), ("_id", DESCENDING)]
+
+# Everything the public verification response is built from
+CREDENTIAL_VERIFY_PROJECTION = {
+    "token_id": 1,
+    "transaction_hash": 1,
+    "owner_wallet": 1,
+    "ipfs_cid": 1,
+    "metadata": 1,
+    "status": 1,
+}
+
+# What a credential's chain leaf is computed from
+CREDENTIAL_CHAIN_PROJECTION = {"token_id": 1, "owner_wallet": 1, "ipfs_cid": 1}
+
+
+async def ensure_indexes(db) -> List[str]:
+    # create_indexes is a no-op for indexes that already exist with the same spec
+    names = await db['users'].create_indexes(USER_INDEXES)
+    names += await db['credentials'].create_indexes(CREDENTIAL_INDEXES)
+    names += await db['blocks'].create_indexes(BLOCK_INDEXES)
+    return names
+
+
+def encode_cursor(document: dict) -> str:
+    # Opaque keyset position: the sort key of the last document on a page
+    raw = json.dumps([document["created_at"], str(document["_id"])]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[str, ObjectId]:
+    try:
+        created_at, object_id = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        return str(created_at), ObjectId(object_id)
+    except (ValueError, TypeError, InvalidId):
+        raise ValueError("Invalid cursor")
+
+
+def parse_object_id(value: str) -> Optional[ObjectId]:
+    try:
+        return ObjectId(value)
+    except (InvalidId, TypeError):
+        return None
+
+
+# Async repositories: handlers await these instead of calling the driver directly
+class UserRepository:
+    def __init__(self, collection, cache=None):
+        self.collection = collection
+        self.cache = cache
+
+    async def get_by_username(self, username: str) -> Optional[dict]:
+        if self.cache is not None:
+            user = self.cache.get(username)
+            if user is not None:
+                return user
+        user = await self.collection.find_one({"username": username})
+        if user is not None and self.cache is not None:
+            self.cache.put(username, user)
+        return user
+
+    async def get_by_email(self, email: str) -> Optional[dict]:
+        return await self.collection.find_one({"email": email})
+
+    async def create(self, user: dict) -> str:
+        result = await self.collection.insert_one(user)
+        self._invalidate(user["username"])
+        return str(result.inserted_id)
+
+    async def update(self, username: str, fields: dict) -> bool:
+        result = await self.collection.update_one({"username": username}, {"$set": fields})
+        self._invalidate(username)
+        if "username" in fields:
+            self._invalidate(fields["username"])
+        return result.matched_count > 0
+
+    def _invalidate(self, username: str):
+        if self.cache is not None:
+            self.cache.invalidate(username)
+
+
+class CredentialRepository:
+    def __init__(self, collection, cache=None):
+        self.collection = collection
+        # Verification results keyed by credential id, invalidated on status changes
+        self.cache = cache
+
+    async def get(self, credential_id: str) -> Optional[dict]:
+        object_id = parse_object_id(credential_id)
+        if object_id is None:
+            return None
+        return await self.collection.find_one({"_id": object_id})
+
+    async def get_many(self, credential_ids: List[str], projection: Optional[dict] = None) -> dict:
+        """Credentials by id with a single ``$in`` query, keyed by the id string; unknown ids are absent."""
+        object_ids = [oid for oid in map(parse_object_id, credential_ids) if oid is not None]
+        if not object_ids:
+            return {}
+        documents = await self.collection.find({"_id": {"$in": object_ids}}, projection).to_list(length=None)
+        return {str(d["_id"]): d for d in documents}
+
+    async def set_status(self, credential_id: str, status: str) -> bool:
+        object_id = parse_object_id(credential_id)
+        if object_id is None:
+            return False
+        result = await self.collection.update_one({"_id": object_id}, {"$set": {"status": status}})
+        if self.cache is not None:
+            self.cache.invalidate(credential_id)
+        return result.matched_count > 0
+
+    async def list_page(self, username: str, limit: int, after: Optional[Tuple[str, ObjectId]] = None,
+                        full: bool = False) -> List[dict]:
+        """Up to ``limit`` credentials, newest first, strictly after the ``after`` keyset position."""
+        query = {"owner_username": username}
+        if after is not None:
+            created_at, object_id = after
+            query["$or"] = [
+                {"created_at": {"$lt": created_at}},
+                {"created_at": created_at, "_id": {"$lt": object_id}},
+            ]
+        projection = None if full else CREDENTIAL_SUMMARY_PROJECTION
+        cursor = self.collection.find(query, projection).sort(LIST_SORT).limit(limit)
+        return await cursor.to_list(length=limit)
+
+    async def count_for_owner(self, username: str, limit: int = 0) -> int:
+        # limit stops counting early, so very large owners cost a bounded index scan
+        if limit:
+            return await self.collection.count_documents({"owner_username": username}, limit=limit)
+        return await self.collection.count_documents({"owner_username": username})
+
+    async def create(self, credential: dict) -> str:
+        result = await self.collection.insert_one(credential)
+        return str(result.inserted_id)
+
+    async def create_many(self, credentials: List[dict]) -> List[Tuple[Optional[str], Optional[str]]]:
+        """Bulk insert; returns ``(credential_id, error)`` for each document, in order."""
+        for credential in credentials:
+            credential.setdefault("_id", ObjectId())
+        errors = {}
+        try:
+            await self.collection.insert_many(credentials, ordered=False)
+        except BulkWriteError as e:
+            errors = {err["index"]: err.get("errmsg", "insert failed") for err in e.details.get("writeErrors", [])}
+        return [(None, errors[i]) if i in errors else (str(c["_id"]), None) for i, c in enumerate(credentials)]
+
+    async def max_token_id(self) -> int:
+        documents = await self.collection.find({}, {"token_id": 1}).sort([("token_id", DESCENDING)]).limit(1).to_list(length=1)
+        return (documents[0].get("token_id") or 0) if documents else 0
+
+    async def scan(self, projection: dict, after: Optional[ObjectId] = None, before: Optional[ObjectId] = None,
+                   batch_size: int = 500):
+        # Credentials with after < _id < before in _id order, one page per round trip
+        while True:
+            query = {"_id": {"$gt": after}} if after is not None else {}
+            if before is not None:
+                query.setdefault("_id", {})["$lt"] = before
+            page = await self.collection.find(query, projection).sort([("_id", ASCENDING)]).limit(batch_size).to_list(length=batch_size)
+            if not page:
+                return
+            yield page
+            after = page[-1]["_id"]
+
+
+class BlockRepository:
+    """Sealed blocks of the simulated chain, so proofs survive restarts and are shared between workers."""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def save(self, block: dict) -> bool:
+        """Insert a sealed block; False if a different block already has its number."""
+        try:
+            await self.collection.insert_one(block)
+        except DuplicateKeyError:
+            # Block numbers are the _id; a retried save of the same block is not a collision
+            existing = await self.collection.find_one({"_id": block["_id"]}, {"root": 1})
+            return existing is not None and existing["root"] == block["root"]
+        return True
+
+    async def find_by_leaves(self, leaves: List[str]) -> List[dict]:
+        return await self.collection.find({"leaves": {"$in": leaves}}).to_list(length=None)
+
+    async def known_leaves(self, leaves: List[str]) -> set:
+        documents = await self.collection.find({"leaves": {"$in": leaves}}, {"leaves": 1}).to_list(length=None)
+        return {leaf for d in documents for leaf in d["leaves"]} & set(leaves)
+
+    async def last(self) -> Optional[dict]:
+        # Highest token id and block number recorded so far
+        by_token = await self.collection.find({}, {"max_token_id": 1}).sort([("max_token_id", DESCENDING)]).limit(1).to_list(length=1)
+        by_number = await self.collection.find({}, {"_id": 1}).sort([("_id", DESCENDING)]).limit(1).to_list(length=1)
+        if not by_token:
+            return None
+        return {"max_token_id": by_token[0]["max_token_id"], "number": by_number[0]["_id"]}
+
+
+class ChainStateRepository:
+    """Counters and markers shared by every worker that mints on the simulated chain."""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def reserve(self, name: str, count: int) -> range:
+        # $inc is atomic, so concurrent workers always get disjoint ranges
+        document = await self.collection.find_one_and_update(
+            {"_id": name}, {"$inc": {"value": count}}, upsert=True, return_document=ReturnDocument.AFTER)
+        return range(document["value"] - count + 1, document["value"] + 1)
+
+    async def raise_to(self, name: str, value):
+        await self.collection.update_one({"_id": name}, {"$max": {"value": value}}, upsert=True)
+
+    async def get(self, name: str):
+        document = await self.collection.find_one({"_id": name})
+        return document["value"] if document else None
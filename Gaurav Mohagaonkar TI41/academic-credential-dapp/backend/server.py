@@ -1,21 +1,80 @@
-from fastapi import FastAPI, HTTPException, Depends, File, UploadFile, status, Form
+from fastapi import FastAPI, HTTPException, Depends, File, UploadFile, status, Form, Request, Query
 # FIX: Import OAuth2PasswordRequestForm for handling login form data
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials, OAuth2PasswordRequestForm
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import Response
 from pydantic import BaseModel, EmailStr
-from typing import Optional, List, Annotated
+from typing import Optional, List, Annotated, Literal
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
-from passlib.context import CryptContext
-from pymongo import MongoClient
+from contextlib import asynccontextmanager
+from repository import (create_client, ensure_indexes, decode_cursor, encode_cursor, MONGO_DB_NAME,
+                        CREDENTIAL_CHAIN_PROJECTION, CREDENTIAL_VERIFY_PROJECTION, UserRepository,
+                        CredentialRepository, BlockRepository, ChainStateRepository)
+from pymongo.errors import DuplicateKeyError, PyMongoError
+from passwords import PasswordHasher, PasswordPoolFull
+from ttl_cache import (TTLCache, USER_CACHE_MAX_ENTRIES, USER_CACHE_TTL_SECONDS, VERIFY_CACHE_MAX_ENTRIES,
+                       VERIFY_CACHE_TTL_SECONDS)
+from blob_store import BlobStore
+from downloads import blob_response, etag_matches
+from blockchain import BLOCK_NUMBER_FLOOR, TOKEN_ID_FLOOR, Block, MockBlockchainService, leaf_hash
+from batch_issue import (BATCH_CONCURRENCY, MINT_BATCH_SIZE, parse_manifest, store_archive_member,
+                         validate_row)
+from starlette.concurrency import run_in_threadpool
+from bson import ObjectId
+try:
+    # orjson serialises large listings several times faster than the standard json module.
+    # ORJSONResponse imports without it and only fails when rendering, so probe for it explicitly
+    import orjson  # noqa: F401
+    from fastapi.responses import ORJSONResponse as FastJSONResponse
+except ImportError:
+    from fastapi.responses import JSONResponse as FastJSONResponse
 import os
 import hashlib
 import secrets
-import base64
-from bson import ObjectId
+import logging
+import json
+import asyncio
+import time
+import zipfile
+
+# MongoDB connection (async driver with a bounded pool, see repository.py)
+client = create_client()
+db = client[MONGO_DB_NAME]
+# get_current_user runs on every authenticated request; recent users are served from memory
+user_cache = TTLCache(USER_CACHE_TTL_SECONDS, USER_CACHE_MAX_ENTRIES)
+users_repo = UserRepository(db['users'], cache=user_cache)
+# Public verification results, dropped when a credential's status changes
+verify_cache = TTLCache(VERIFY_CACHE_TTL_SECONDS, VERIFY_CACHE_MAX_ENTRIES)
+credentials_repo = CredentialRepository(db['credentials'], cache=verify_cache)
+blocks_repo = BlockRepository(db['blocks'])
+chain_state_repo = ChainStateRepository(db['chain_state'])
+
+# bcrypt runs on its own bounded pool (see passwords.py)
+password_hasher = PasswordHasher()
 
-app = FastAPI()
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    try:
+        logger.info("MongoDB indexes ready: %s", ", ".join(await ensure_indexes(db)))
+    except PyMongoError as e:
+        # Keep serving; lookups fall back to collection scans until this is fixed
+        logger.error("Could not create MongoDB indexes: %s", e)
+    try:
+        logger.info("Chain restored; anchored %d credentials without a saved block", await restore_chain())
+    except PyMongoError as e:
+        logger.error("Could not restore chain state: %s", e)
+    sealer = asyncio.create_task(seal_blocks())
+    yield
+    sealer.cancel()
+    blockchain_service.seal_open_block()
+    await save_blocks()
+    client.close()
+    password_hasher.shutdown()
+
+app = FastAPI(lifespan=lifespan)
 
 # CORS configuration
 app.add_middleware(
@@ -26,19 +85,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# MongoDB connection
-MONGO_URL = os.environ.get('MONGO_URL', 'mongodb://localhost:27017/')
-client = MongoClient(MONGO_URL)
-db = client['credential_dapp']
-users_collection = db['users']
-credentials_collection = db['credentials']
-
 # JWT configuration
 JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY', 'your-secret-key-change-in-production')
 JWT_ALGORITHM = os.environ.get('JWT_ALGORITHM', 'HS256')
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.environ.get('ACCESS_TOKEN_EXPIRE_MINUTES', 1440))
+UPLOAD_CHUNK_SIZE = int(os.environ.get('UPLOAD_CHUNK_SIZE', 1024 * 1024))
+LIST_DEFAULT_LIMIT = int(os.environ.get('LIST_DEFAULT_LIMIT', 50))
+LIST_MAX_LIMIT = int(os.environ.get('LIST_MAX_LIMIT', 200))
+LIST_COUNT_LIMIT = int(os.environ.get('LIST_COUNT_LIMIT', 10000))
+VERIFY_MAX_AGE_SECONDS = int(os.environ.get('VERIFY_MAX_AGE_SECONDS', 60))
+VERIFY_BATCH_MAX = int(os.environ.get('VERIFY_BATCH_MAX', 500))
+# Newer credentials may still sit in another worker's open block, so startup leaves them alone
+CHAIN_RESTORE_GRACE_SECONDS = float(os.environ.get('CHAIN_RESTORE_GRACE_SECONDS', 60))
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
 
 # Pydantic models
@@ -61,73 +120,107 @@ class IssueCredentialRequest(BaseModel):
     grade: str
     subjects: List[dict]
 
+class VerifyBatchRequest(BaseModel):
+    credential_ids: List[str]
+
 class User(BaseModel):
     username: str
     email: str
     full_name: str
 
-# Mock Blockchain Service
-class MockBlockchainService:
-    def __init__(self):
-        self.transaction_counter = 1000
-        self.block_number = 5000000
-    
-    def mint_nft(self, to_address: str, token_uri: str) -> dict:
-        self.transaction_counter += 1
-        self.block_number += 1
-        
-        tx_hash = '0x' + hashlib.sha256(f"{to_address}{token_uri}{self.transaction_counter}".encode()).hexdigest()
-        token_id = self.transaction_counter
-        
-        return {
-            'transaction_hash': tx_hash,
-            'token_id': token_id,
-            'block_number': self.block_number,
-            'from': '0x0000000000000000000000000000000000000000',
-            'to': to_address,
-            'gas_used': 150000,
-            'status': 'success',
-            'network': 'Sepolia Testnet (Simulated)'
-        }
-    
-    def verify_token(self, token_id: int) -> dict:
-        return {
-            'token_id': token_id,
-            'exists': True,
-            'verified': True,
-            'network': 'Sepolia Testnet (Simulated)'
-        }
+# Mints are batched into Merkle-committed blocks (see blockchain.py)
+blockchain_service = MockBlockchainService()
 
-# Mock IPFS Service
-class MockIPFSService:
-    def __init__(self):
-        self.storage = {}
-    
-    def upload_file(self, file_content: bytes, filename: str) -> str:
-        content_hash = hashlib.sha256(file_content).hexdigest()
-        cid = f"Qm{content_hash[:44]}"
-        
-        self.storage[cid] = {
-            'content': base64.b64encode(file_content).decode('utf-8'),
-            'filename': filename,
-            'size': len(file_content),
-            'uploaded_at': datetime.utcnow().isoformat()
-        }
-        
-        return cid
+async def seal_blocks():
+    while True:
+        await asyncio.sleep(blockchain_service.block_interval)
+        blockchain_service.seal_expired()
+        await save_blocks()
+
+async def save_blocks():
+    # The chain service seals synchronously; persist whatever it has sealed since the last call
+    blocks = blockchain_service.take_unsaved()
+    for i, block in enumerate(blocks):
+        try:
+            while not await blocks_repo.save(block.to_document()):
+                # Another worker saved a different block under this number first
+                number, = await chain_state_repo.reserve("block_number", 1)
+                logger.warning("Block %s already taken, saving as %s", block.number, number)
+                blockchain_service.renumber(block, number)
+        except PyMongoError as e:
+            blockchain_service.unsaved[:0] = blocks[i:]
+            logger.error("Could not save block %s: %s", block.number, e)
+            return
+
+async def reserve_chain_numbers(token_ids: int, mints: int):
+    # Taken from shared counters so concurrent workers never reuse a number. Checked
+    # again after every await: other requests may have used what was reserved meanwhile
+    while True:
+        tokens, blocks = blockchain_service.shortfall(token_ids, mints)
+        if not tokens and not blocks:
+            return
+        blockchain_service.reserve(await chain_state_repo.reserve("token_id", tokens) if tokens else (),
+                                   await chain_state_repo.reserve("block_number", blocks) if blocks else ())
+
+async def restore_chain() -> int:
+    """Bring the shared chain state up to date with the credentials in MongoDB.
+
+    The token id and block number counters are raised past anything already
+    stored, which covers data written before the counters existed. Credentials
+    no saved block commits to (issued before blocks were persisted, or minted
+    into a block that was never saved) are anchored under their own token ids.
+    Only credentials after the ``anchored_through`` mark are checked, so after
+    the first start this is a short scan; other blocks are loaded on demand
+    when verified.
+    """
+    last = await blocks_repo.last()
+    await chain_state_repo.raise_to("token_id", max(TOKEN_ID_FLOOR, await credentials_repo.max_token_id(),
+                                                    last["max_token_id"] if last else 0))
+    await chain_state_repo.raise_to("block_number", max(BLOCK_NUMBER_FLOOR, last["number"] if last else 0))
     
-    def get_file(self, cid: str) -> Optional[dict]:
-        return self.storage.get(cid)
+    anchored = 0
+    after = await chain_state_repo.get("anchored_through")
+    before = ObjectId.from_datetime(datetime.utcnow() - timedelta(seconds=CHAIN_RESTORE_GRACE_SECONDS))
+    async for page in credentials_repo.scan(CREDENTIAL_CHAIN_PROJECTION, after=after, before=before):
+        credentials = {credential_leaf(c): c for c in page if c.get("token_id") is not None}
+        unanchored = set(credentials) - await blocks_repo.known_leaves(list(credentials))
+        await reserve_chain_numbers(0, len(unanchored))
+        for leaf in unanchored:
+            c = credentials[leaf]
+            anchored += blockchain_service.anchor_existing(c["token_id"], c.get("owner_wallet"), c.get("ipfs_cid"))
+        blockchain_service.seal_open_block()
+        await save_blocks()
+        if blockchain_service.unsaved:
+            # Not saved; the next start retries from the same mark
+            break
+        await chain_state_repo.raise_to("anchored_through", page[-1]["_id"])
+    return anchored
 
-blockchain_service = MockBlockchainService()
-ipfs_service = MockIPFSService()
+def credential_leaf(credential: dict) -> str:
+    return leaf_hash(credential["token_id"], credential.get("owner_wallet"), credential.get("ipfs_cid"))
+
+async def load_blocks_for(credentials: List[dict]):
+    # Blocks sealed by an earlier run or another worker, fetched in one query
+    missing = [leaf for leaf in map(credential_leaf, credentials) if not blockchain_service.knows(leaf)]
+    if missing:
+        for document in await blocks_repo.find_by_leaves(missing):
+            blockchain_service.load_block(Block.from_document(document))
+
+# Marksheets are stored content-addressed on disk (see blob_store.py)
+ipfs_service = BlobStore()
 
 # Helper functions
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+async def hash_password(password: str) -> str:
+    try:
+        return await password_hasher.hash(password)
+    except PasswordPoolFull:
+        raise HTTPException(status_code=503, detail="Server busy, please retry", headers={"Retry-After": "1"})
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    try:
+        return await password_hasher.verify(plain_password, hashed_password)
+    except PasswordPoolFull:
+        raise HTTPException(status_code=503, detail="Server busy, please retry", headers={"Retry-After": "1"})
 
 def create_access_token(data: dict) -> str:
     to_encode = data.copy()
@@ -139,6 +232,17 @@ def create_access_token(data: dict) -> str:
 def generate_wallet_address() -> str:
     return '0x' + secrets.token_hex(20)
 
+async def store_upload(upload: UploadFile) -> str:
+    # Hash and write in chunks so a large scan is never held in memory whole
+    writer = await run_in_threadpool(ipfs_service.writer)
+    try:
+        while chunk := await upload.read(UPLOAD_CHUNK_SIZE):
+            await run_in_threadpool(writer.write, chunk)
+        return await run_in_threadpool(writer.commit, upload.filename)
+    except BaseException:
+        writer.abort()
+        raise
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     token = credentials.credentials
     try:
@@ -149,7 +253,7 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid authentication credentials")
     
-    user = users_collection.find_one({"username": username})
+    user = await users_repo.get_by_username(username)
     if user is None:
         raise HTTPException(status_code=401, detail="User not found")
     
@@ -160,25 +264,40 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
 async def health_check():
     return {"status": "healthy", "service": "Academic Credential dApp API"}
 
+@app.get("/api/metrics")
+async def metrics():
+    return {
+        "password_pool": password_hasher.stats(),
+        "user_cache": user_cache.stats(),
+        "verify_cache": verify_cache.stats(),
+        "blob_store": ipfs_service.stats(),
+        "blockchain": blockchain_service.stats(),
+    }
+
 @app.post("/api/auth/register")
 async def register(user_data: UserRegister):
-    if users_collection.find_one({"username": user_data.username}):
+    if await users_repo.get_by_username(user_data.username):
         raise HTTPException(status_code=400, detail="Username already registered")
     
-    if users_collection.find_one({"email": user_data.email}):
+    if await users_repo.get_by_email(user_data.email):
         raise HTTPException(status_code=400, detail="Email already registered")
     
     user = {
         "username": user_data.username,
         "email": user_data.email,
         "full_name": user_data.full_name,
-        "password_hash": hash_password(user_data.password),
+        "password_hash": await hash_password(user_data.password),
         "wallet_address": generate_wallet_address(),
         "created_at": datetime.utcnow().isoformat(),
         "role": "student"
     }
     
-    users_collection.insert_one(user)
+    try:
+        await users_repo.create(user)
+    except DuplicateKeyError as e:
+        # Another registration with the same name or email won the race since the checks above
+        field = "Email" if "email" in (e.details or {}).get("keyPattern", {}) else "Username"
+        raise HTTPException(status_code=400, detail=f"{field} already registered")
     
     return {
         "message": "User registered successfully",
@@ -191,9 +310,9 @@ async def register(user_data: UserRegister):
 # handles the 'x-www-form-urlencoded' data from your login form.
 @app.post("/api/auth/login")
 async def login(form_data: Annotated[OAuth2PasswordRequestForm, Depends()]):
-    user = users_collection.find_one({"username": form_data.username})
+    user = await users_repo.get_by_username(form_data.username)
     
-    if not user or not verify_password(form_data.password, user["password_hash"]):
+    if not user or not await verify_password(form_data.password, user["password_hash"]):
         raise HTTPException(status_code=401, detail="Invalid username or password")
     
     access_token = create_access_token(data={"sub": user["username"]})
@@ -229,27 +348,49 @@ async def issue_credential(
     marksheet_file: UploadFile = File(...),
     current_user: dict = Depends(get_current_user)
 ):
-    file_content = await marksheet_file.read()
-    ipfs_cid = ipfs_service.upload_file(file_content, marksheet_file.filename)
+    ipfs_cid = await store_upload(marksheet_file)
     
-    metadata = {
-        "name": f"Academic Credential - {student_name}",
-        "description": f"{degree} from {institution}",
+    await reserve_chain_numbers(1, 1)
+    nft_result = blockchain_service.mint_nft(
+        to_address=current_user["wallet_address"],
+        token_uri=ipfs_cid
+    )
+    
+    credential = build_credential(current_user, {
         "student_name": student_name,
         "degree": degree,
         "institution": institution,
         "graduation_year": graduation_year,
         "grade": grade,
+    }, ipfs_cid, nft_result)
+    
+    credential["_id"] = await credentials_repo.create(credential)
+    await save_blocks()
+    
+    return {
+        "message": "Credential issued successfully",
+        "credential_id": credential["_id"],
+        "token_id": nft_result["token_id"],
+        "transaction_hash": nft_result["transaction_hash"],
+        "block_number": nft_result["block_number"],
+        "ipfs_cid": ipfs_cid,
+        "network": "Sepolia Testnet"
+    }
+
+def build_credential(current_user: dict, fields: dict, ipfs_cid: str, nft_result: dict) -> dict:
+    metadata = {
+        "name": f"Academic Credential - {fields['student_name']}",
+        "description": f"{fields['degree']} from {fields['institution']}",
+        "student_name": fields["student_name"],
+        "degree": fields["degree"],
+        "institution": fields["institution"],
+        "graduation_year": fields["graduation_year"],
+        "grade": fields["grade"],
         "marksheet_ipfs": ipfs_cid,
         "issued_date": datetime.utcnow().isoformat()
     }
     
-    nft_result = blockchain_service.mint_nft(
-        to_address=current_user["wallet_address"],
-        token_uri=ipfs_cid
-    )
-    
-    credential = {
+    return {
         "owner_username": current_user["username"],
         "owner_wallet": current_user["wallet_address"],
         "token_id": nft_result["token_id"],
@@ -260,35 +401,110 @@ async def issue_credential(
         "created_at": datetime.utcnow().isoformat(),
         "status": "confirmed"
     }
+
+@app.post("/api/credentials/issue/batch")
+async def issue_credentials_batch(
+    manifest: UploadFile = File(...),
+    marksheets: UploadFile = File(...),
+    current_user: dict = Depends(get_current_user)
+):
+    start = time.perf_counter()
+    try:
+        rows = parse_manifest(await manifest.read(), manifest.filename)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        archive = zipfile.ZipFile(marksheets.file)
+    except zipfile.BadZipFile:
+        raise HTTPException(status_code=400, detail="marksheets must be a zip archive")
+    
+    results = [{"row": i + 1, "student_name": row.get("student_name"), "status": "failed"} for i, row in enumerate(rows)]
+    
+    # 1. Validate rows and store their marksheets, a bounded number at a time
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+    
+    async def store(i, row):
+        async with semaphore:
+            try:
+                fields = validate_row(row)
+                return fields, await run_in_threadpool(store_archive_member, ipfs_service, archive, fields["marksheet"])
+            except (ValueError, zipfile.BadZipFile) as e:
+                results[i]["error"] = str(e)
+                return None
     
-    result = credentials_collection.insert_one(credential)
-    credential["_id"] = str(result.inserted_id)
+    stored = await asyncio.gather(*(store(i, row) for i, row in enumerate(rows)))
+    pending = [(i, *item) for i, item in enumerate(stored) if item is not None]
     
+    # 2. Mint in blocks of MINT_BATCH_SIZE
+    await reserve_chain_numbers(len(pending), len(pending))
+    nft_results = []
+    for offset in range(0, len(pending), MINT_BATCH_SIZE):
+        cids = [cid for _, _, cid in pending[offset:offset + MINT_BATCH_SIZE]]
+        nft_results += blockchain_service.mint_batch(current_user["wallet_address"], cids)
+    
+    # 3. One unordered bulk insert; a failed document does not stop the rest
+    credentials = [build_credential(current_user, fields, cid, nft) for (_, fields, cid), nft in zip(pending, nft_results)]
+    inserted = await credentials_repo.create_many(credentials) if credentials else []
+    await save_blocks()
+    
+    for (i, _, cid), nft, (credential_id, error) in zip(pending, nft_results, inserted):
+        if error is not None:
+            results[i]["error"] = error
+            continue
+        results[i].update({
+            "status": "issued",
+            "credential_id": credential_id,
+            "token_id": nft["token_id"],
+            "transaction_hash": nft["transaction_hash"],
+            "block_number": nft["block_number"],
+            "ipfs_cid": cid,
+        })
+    
+    issued = sum(1 for r in results if r["status"] == "issued")
     return {
-        "message": "Credential issued successfully",
-        "credential_id": credential["_id"],
-        "token_id": nft_result["token_id"],
-        "transaction_hash": nft_result["transaction_hash"],
-        "block_number": nft_result["block_number"],
-        "ipfs_cid": ipfs_cid,
-        "network": "Sepolia Testnet"
+        "message": f"Issued {issued} of {len(results)} credentials",
+        "total": len(results),
+        "issued": issued,
+        "failed": len(results) - issued,
+        "elapsed_seconds": round(time.perf_counter() - start, 3),
+        "network": "Sepolia Testnet",
+        "results": results
     }
 
 @app.get("/api/credentials/list")
-async def list_credentials(current_user: dict = Depends(get_current_user)):
-    credentials = list(credentials_collection.find({"owner_username": current_user["username"]}))
+async def list_credentials(
+    limit: int = Query(LIST_DEFAULT_LIMIT, ge=1, le=LIST_MAX_LIMIT),
+    cursor: Optional[str] = None,
+    view: Literal["summary", "full"] = "summary",
+    current_user: dict = Depends(get_current_user)
+):
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # One extra document tells us whether another page follows
+    credentials = await credentials_repo.list_page(current_user["username"], limit + 1, after, full=view == "full")
+    has_more = len(credentials) > limit
+    credentials = credentials[:limit]
+    next_cursor = encode_cursor(credentials[-1]) if has_more else None
     
     for cred in credentials:
         cred["_id"] = str(cred["_id"])
     
-    return {"credentials": credentials}
+    body = {"credentials": credentials, "limit": limit, "next_cursor": next_cursor}
+    if after is None:
+        # Counted on the first page only, and capped so huge owners stay cheap
+        total = await credentials_repo.count_for_owner(current_user["username"], LIST_COUNT_LIMIT)
+        body["total"] = total
+        body["total_is_lower_bound"] = total >= LIST_COUNT_LIMIT
+    
+    # Plain JSON documents, so FastAPI's generic encoder can be skipped
+    return FastJSONResponse(body)
 
 @app.get("/api/credentials/{credential_id}")
 async def get_credential(credential_id: str, current_user: dict = Depends(get_current_user)):
-    try:
-        credential = credentials_collection.find_one({"_id": ObjectId(credential_id)})
-    except:
-        raise HTTPException(status_code=404, detail="Credential not found")
+    credential = await credentials_repo.get(credential_id)
     
     if not credential:
         raise HTTPException(status_code=404, detail="Credential not found")
@@ -296,20 +512,13 @@ async def get_credential(credential_id: str, current_user: dict = Depends(get_cu
     credential["_id"] = str(credential["_id"])
     return credential
 
-@app.get("/api/credentials/{credential_id}/verify")
-async def verify_credential(credential_id: str):
-    try:
-        credential = credentials_collection.find_one({"_id": ObjectId(credential_id)})
-    except:
-        raise HTTPException(status_code=404, detail="Credential not found")
-    
-    if not credential:
-        raise HTTPException(status_code=404, detail="Credential not found")
-    
-    verification = blockchain_service.verify_token(credential["token_id"])
+def build_verification(credential: dict) -> dict:
+    verification = blockchain_service.verify_token(credential["token_id"], credential["owner_wallet"], credential["ipfs_cid"])
+    status = credential.get("status", "confirmed")
     
-    return {
-        "verified": True,
+    body = {
+        "verified": verification["verified"] and status != "revoked",
+        "status": status,
         "token_id": credential["token_id"],
         "transaction_hash": credential["transaction_hash"],
         "owner_wallet": credential["owner_wallet"],
@@ -317,32 +526,74 @@ async def verify_credential(credential_id: str):
         "blockchain_verification": verification,
         "ipfs_cid": credential["ipfs_cid"]
     }
+    etag = '"' + hashlib.sha256(json.dumps(body, sort_keys=True, default=str).encode()).hexdigest()[:32] + '"'
+    return {"body": body, "etag": etag}
 
-@app.get("/api/credentials/{credential_id}/download")
-async def download_marksheet(credential_id: str, current_user: dict = Depends(get_current_user)):
-    try:
-        credential = credentials_collection.find_one({"_id": ObjectId(credential_id)})
-    except:
+async def cached_verifications(credential_ids: List[str]) -> dict:
+    # Cache first; every miss is then fetched with one $in query
+    results = {}
+    for credential_id in credential_ids:
+        cached = verify_cache.get(credential_id)
+        if cached is not None:
+            results[credential_id] = cached
+    missing = [credential_id for credential_id in credential_ids if credential_id not in results]
+    if missing:
+        credentials = await credentials_repo.get_many(missing, CREDENTIAL_VERIFY_PROJECTION)
+        await load_blocks_for(list(credentials.values()))
+        for credential_id, credential in credentials.items():
+            results[credential_id] = build_verification(credential)
+            # Only sealed results are final; pending or unknown ones change once a block is sealed
+            if results[credential_id]["body"]["blockchain_verification"]["status"] == "sealed":
+                verify_cache.put(credential_id, results[credential_id])
+    return results
+
+@app.get("/api/credentials/{credential_id}/verify")
+async def verify_credential(credential_id: str, request: Request):
+    result = (await cached_verifications([credential_id])).get(credential_id)
+    
+    if not result:
         raise HTTPException(status_code=404, detail="Credential not found")
     
+    sealed = result["body"]["blockchain_verification"]["status"] == "sealed"
+    headers = {"ETag": result["etag"], "Cache-Control": f"public, max-age={VERIFY_MAX_AGE_SECONDS}" if sealed else "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), result["etag"]):
+        return Response(status_code=304, headers=headers)
+    return FastJSONResponse(result["body"], headers=headers)
+
+@app.post("/api/credentials/verify/batch")
+async def verify_credentials_batch(request_data: VerifyBatchRequest):
+    credential_ids = list(dict.fromkeys(request_data.credential_ids))
+    if len(credential_ids) > VERIFY_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {VERIFY_BATCH_MAX} credential ids per request")
+    
+    found = await cached_verifications(credential_ids)
+    results = [
+        {"credential_id": credential_id, **found[credential_id]["body"]} if credential_id in found
+        else {"credential_id": credential_id, "verified": False, "error": "Credential not found"}
+        for credential_id in credential_ids
+    ]
+    return FastJSONResponse({
+        "total": len(results),
+        "verified": sum(1 for r in results if r["verified"]),
+        "results": results
+    })
+
+@app.get("/api/credentials/{credential_id}/download")
+async def download_marksheet(credential_id: str, request: Request, current_user: dict = Depends(get_current_user)):
+    credential = await credentials_repo.get(credential_id)
+    
     if not credential:
         raise HTTPException(status_code=404, detail="Credential not found")
     
     if credential["owner_username"] != current_user["username"]:
         raise HTTPException(status_code=403, detail="Access denied")
     
-    file_data = ipfs_service.get_file(credential["ipfs_cid"])
+    file_data = await run_in_threadpool(ipfs_service.get_file, credential["ipfs_cid"])
     
     if not file_data:
         raise HTTPException(status_code=404, detail="File not found in IPFS")
     
-    file_content = base64.b64decode(file_data["content"])
-    
-    return Response(
-        content=file_content,
-        media_type="application/octet-stream",
-        headers={"Content-Disposition": f'attachment; filename="{file_data["filename"]}"'}
-    )
+    return blob_response(request, file_data)
 
 if __name__ == "__main__":
     import uvicorn
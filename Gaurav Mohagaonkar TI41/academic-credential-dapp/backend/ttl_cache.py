@@ -0,0 +1,70 @@
+from collections import OrderedDict
+from typing import Optional
+import os
+import time
+
+USER_CACHE_TTL_SECONDS = float(os.environ.get('USER_CACHE_TTL_SECONDS', 60))
+USER_CACHE_MAX_ENTRIES = int(os.environ.get('USER_CACHE_MAX_ENTRIES', 1024))
+VERIFY_CACHE_TTL_SECONDS = float(os.environ.get('VERIFY_CACHE_TTL_SECONDS', 300))
+VERIFY_CACHE_MAX_ENTRIES = int(os.environ.get('VERIFY_CACHE_MAX_ENTRIES', 10000))
+
+
+class TTLCache:
+    """In-process cache with a per-entry TTL and least-recently-used eviction.
+
+    Used for users keyed by token subject and for public verification results
+    keyed by credential id. Entries expire after ``ttl`` seconds and the least
+    recently used entry is dropped once ``max_entries`` is reached. The cache
+    is per process: writes in this process invalidate it, and the TTL bounds
+    how stale another worker process can be.
+    """
+
+    def __init__(self, ttl, max_entries, clock=time.monotonic):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: str) -> Optional[dict]:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > self.clock():
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(entry[1])
+        if entry is not None:
+            del self._entries[key]
+        self.misses += 1
+        return None
+
+    def put(self, key: str, value: dict):
+        if self.max_entries <= 0 or self.ttl <= 0:
+            return
+        self._entries[key] = (self.clock() + self.ttl, dict(value))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: str):
+        if self._entries.pop(key, None) is not None:
+            self.invalidations += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'ttl_seconds': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+        }
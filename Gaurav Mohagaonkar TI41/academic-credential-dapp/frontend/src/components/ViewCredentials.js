@@ -6,6 +6,8 @@ function ViewCredentials() {
   const [credentials, setCredentials] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const navigate = useNavigate();
 
   useEffect(() => {
@@ -16,6 +18,7 @@ function ViewCredentials() {
     try {
       const response = await api.get('/api/credentials/list');
       setCredentials(response.data.credentials);
+      setNextCursor(response.data.next_cursor);
     } catch (err) {
       setError('Failed to fetch credentials');
     } finally {
@@ -23,6 +26,19 @@ function ViewCredentials() {
     }
   };
 
+  const fetchMoreCredentials = async () => {
+    setLoadingMore(true);
+    try {
+      const response = await api.get('/api/credentials/list', { params: { cursor: nextCursor } });
+      setCredentials((previous) => [...previous, ...response.data.credentials]);
+      setNextCursor(response.data.next_cursor);
+    } catch (err) {
+      setError('Failed to fetch credentials');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleDownload = async (credentialId, studentName) => {
     try {
       const response = await api.get(`/api/credentials/${credentialId}/download`, {
@@ -170,6 +186,18 @@ function ViewCredentials() {
             ))}
           </div>
         )}
+
+        {nextCursor && (
+          <div className="text-center mt-8">
+            <button
+              onClick={fetchMoreCredentials}
+              disabled={loadingMore}
+              className="px-6 py-3 bg-gray-100 text-gray-700 font-medium rounded-lg hover:bg-gray-200 transition-colors disabled:opacity-50"
+            >
+              {loadingMore ? 'Loading...' : 'Load More'}
+            </button>
+          </div>
+        )}
       </main>
     </div>
   );
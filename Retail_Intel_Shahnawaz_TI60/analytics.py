@@ -0,0 +1,162 @@
+import calendar
+
+import pandas as pd
+
+from forecast import FORECAST_MONTHS, forecast_products, forecast_total
+
+CHUNK_SIZE = 100_000
+# Bump whenever dashboard_payload changes shape so cached payloads are not reused
+PAYLOAD_VERSION = 2
+LOW_STOCK_THRESHOLD = 10
+
+# Explicit dtypes so each chunk is parsed straight into compact columns
+COLUMNS = ['Date', 'Product', 'Units_Sold', 'Price', 'Stock']
+DTYPES = {
+    'Product': 'category',
+    'Units_Sold': 'int32',
+    'Price': 'int32',
+    'Stock': 'int32',
+}
+PRODUCT_COLUMNS = ['units', 'revenue', 'low_stock']
+
+
+def read_chunks(filepath, chunksize=CHUNK_SIZE):
+    return pd.read_csv(filepath, usecols=COLUMNS, dtype=DTYPES, parse_dates=['Date'], chunksize=chunksize)
+
+
+class SalesAggregate:
+    """Running totals for every metric the dashboard needs, updated one chunk at a time."""
+
+    def __init__(self):
+        self.rows = 0
+        self.total_sales = 0
+        self.low_stock_count = 0
+        self.products = pd.DataFrame(columns=PRODUCT_COLUMNS, dtype='int64')
+        self.month_units = pd.Series(dtype='int64')
+        self.weekday_units = pd.Series(dtype='int64')
+        self.product_months = pd.DataFrame(dtype='int64')  # units, products x month numbers
+
+    def update(self, chunk):
+        units = chunk['Units_Sold'].astype('int64')
+        revenue = units * chunk['Price']
+        low_stock = (chunk['Stock'] < LOW_STOCK_THRESHOLD).astype('int64')
+
+        self.rows += len(chunk)
+        self.total_sales += int(revenue.sum())
+        self.low_stock_count += int(low_stock.sum())
+
+        # One groupby per key: products, and product-days (rolled up into month/weekday buckets)
+        per_product = pd.DataFrame({'units': units, 'revenue': revenue, 'low_stock': low_stock})
+        per_product = per_product.groupby(chunk['Product'], observed=True).sum()
+        per_product.index = per_product.index.astype(str)
+        self.products = _add(self.products, per_product)
+
+        product_days = units.groupby([chunk['Product'], chunk['Date']], observed=True).sum()
+        products = product_days.index.get_level_values(0).astype(str)
+        days = product_days.index.get_level_values(1)
+        product_months = product_days.groupby([products, days.month]).sum().unstack(fill_value=0)
+        self.product_months = _add(self.product_months, product_months)
+
+        daily = product_days.groupby(level=1).sum()
+        self.month_units = _add(self.month_units, daily.groupby(daily.index.month).sum())
+        self.weekday_units = _add(self.weekday_units, daily.groupby(daily.index.weekday).sum())
+
+    def merge(self, other):
+        self.rows += other.rows
+        self.total_sales += other.total_sales
+        self.low_stock_count += other.low_stock_count
+        self.products = _add(self.products, other.products)
+        self.month_units = _add(self.month_units, other.month_units)
+        self.weekday_units = _add(self.weekday_units, other.weekday_units)
+        self.product_months = _add(self.product_months, other.product_months)
+        return self
+
+    def to_dict(self):
+        return {
+            'rows': self.rows,
+            'total_sales': self.total_sales,
+            'low_stock_count': self.low_stock_count,
+            'products': {name: [int(v) for v in values] for name, values in zip(self.products.index, self.products.values)},
+            'month_units': {str(k): int(v) for k, v in self.month_units.items()},
+            'weekday_units': {str(k): int(v) for k, v in self.weekday_units.items()},
+            'product_months': {
+                name: {str(month): int(v) for month, v in row.items() if v}
+                for name, row in self.product_months.iterrows()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        agg = cls()
+        agg.rows = data['rows']
+        agg.total_sales = data['total_sales']
+        agg.low_stock_count = data['low_stock_count']
+        if data['products']:
+            agg.products = pd.DataFrame.from_dict(data['products'], orient='index', columns=PRODUCT_COLUMNS).astype('int64')
+        agg.month_units = pd.Series({int(k): v for k, v in data['month_units'].items()}, dtype='int64')
+        agg.weekday_units = pd.Series({int(k): v for k, v in data['weekday_units'].items()}, dtype='int64')
+        product_months = {name: {int(m): v for m, v in row.items()} for name, row in data.get('product_months', {}).items()}
+        if product_months:
+            agg.product_months = pd.DataFrame.from_dict(product_months, orient='index').fillna(0).astype('int64')
+        return agg
+
+
+def _add(total, part):
+    if len(total) == 0:
+        return part.astype('int64')
+    return total.add(part, fill_value=0).fillna(0).astype('int64')
+
+
+def aggregate_csv(filepath, chunksize=CHUNK_SIZE):
+    agg = SalesAggregate()
+    for chunk in read_chunks(filepath, chunksize):
+        agg.update(chunk)
+    return agg
+
+
+def dashboard_payload(agg):
+    products = agg.products.sort_index()
+    month_units = agg.month_units.sort_index()
+    weekday_units = agg.weekday_units.sort_index()
+
+    top_product = products['units'].idxmax()
+    top_revenue_product = products['revenue'].idxmax()
+    high_demand = products['units'].nlargest(3).index.tolist()
+    top_products_revenue = products['revenue'].nlargest(5)
+    best_day = calendar.day_name[weekday_units.idxmax()]
+    # Every product's trend is fitted in one least-squares solve over the product x month matrix
+    product_months = agg.product_months.reindex(columns=month_units.index, fill_value=0)
+    product_predictions = forecast_products(product_months, FORECAST_MONTHS)
+
+    return {
+        'total_sales': agg.total_sales,
+        'top_product': top_product,
+        'top_revenue_product': top_revenue_product,
+        'best_day': best_day,
+        'low_stock_count': agg.low_stock_count,
+        'low_stock_items': products.index[products['low_stock'] > 0].tolist(),
+        'high_demand': high_demand,
+        'month_labels': [calendar.month_name[m] for m in month_units.index],
+        'month_values': [int(v) for v in month_units.values],
+        'predictions': forecast_total(month_units),
+        'product_predictions': {
+            name: [int(v) for v in row]
+            for name, row in zip(product_predictions.index, product_predictions.values)
+        },
+        'insights': [
+            f"Best-selling product: {top_product}",
+            f"Highest revenue product: {top_revenue_product}",
+            f"Best day for sales: {best_day}",
+            f"Total revenue generated: ₹{int(agg.total_sales)}"
+        ],
+        'top_products': top_products_revenue.index.tolist(),
+        'top_revenue_values': [int(v) for v in top_products_revenue.values],
+    }
+
+
+def write_report(payload, path):
+    summary = pd.DataFrame({
+        'Metric': ['Total Sales', 'Top Product', 'Highest Revenue Product', 'Best Day'],
+        'Value': [payload['total_sales'], payload['top_product'], payload['top_revenue_product'], payload['best_day']]
+    })
+    summary.to_csv(path, index=False)
@@ -1,13 +1,74 @@
-from flask import Flask, render_template, request, send_file
-import pandas as pd
+from flask import Flask, render_template, request, send_file, jsonify, abort, redirect, url_for, g, has_request_context
+import hashlib
 import os
-import numpy as np
-from sklearn.linear_model import LinearRegression
+import re
+import shutil
+import time
+import uuid
+from analytics import PAYLOAD_VERSION, SalesAggregate, dashboard_payload, write_report
+from batch import run_batch_analysis, write_batch_report
+from cache import ResultCache, save_and_hash
+from columnar import BLOCK_SIZE, aggregate_arrow, cube_path, ingest_csv
+from datasets import DatasetStore, dataset_id_for
+from jobs import JobQueue, QueueFull, run_upload_analysis
+from profiling import RequestProfile, metrics, record, stage
+from rollup import RollupCube, RollupQueryError, load_cached, parse_query as parse_rollup_query
+from table import TableQueryError, parse_query, query_page
+from werkzeug.utils import secure_filename
 
-app = Flask(__name__)
+app = Flask(__name__, template_folder='Templates', static_folder='Static')
 UPLOAD_FOLDER = "uploads"
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 app.config["UPLOAD_FOLDER"] = UPLOAD_FOLDER
+app.config["INGEST_BLOCK_SIZE"] = int(os.environ.get("INGEST_BLOCK_SIZE", BLOCK_SIZE))
+app.config["CACHE_MAX_ENTRIES"] = int(os.environ.get("CACHE_MAX_ENTRIES", 64))
+app.config["CACHE_MAX_BYTES"] = int(os.environ.get("CACHE_MAX_BYTES", 64 * 1024 * 1024))
+app.config["MAX_CONCURRENT_JOBS"] = int(os.environ.get("MAX_CONCURRENT_JOBS", 2))
+app.config["MAX_QUEUED_JOBS"] = int(os.environ.get("MAX_QUEUED_JOBS", 16))
+app.config["BATCH_WORKERS"] = int(os.environ.get("BATCH_WORKERS", os.cpu_count() or 1))
+app.config["PROFILE_REQUESTS"] = os.environ.get("PROFILE_REQUESTS") == "1"
+
+result_cache = ResultCache(
+    os.path.join(UPLOAD_FOLDER, 'cache'),
+    max_entries=app.config["CACHE_MAX_ENTRIES"],
+    max_bytes=app.config["CACHE_MAX_BYTES"],
+)
+dataset_store = DatasetStore(os.path.join(UPLOAD_FOLDER, 'datasets'))
+job_queue = JobQueue(max_workers=app.config["MAX_CONCURRENT_JOBS"], max_queued=app.config["MAX_QUEUED_JOBS"])
+DIGEST_RE = re.compile(r'^[0-9a-f]{64}$')
+
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    # ?profile=1 (or PROFILE_REQUESTS=1) dumps cProfile and tracemalloc output for the request
+    if app.config['PROFILE_REQUESTS'] or request.args.get('profile') == '1':
+        profile = RequestProfile(os.path.join(app.config['UPLOAD_FOLDER'], 'profiles'))
+        try:
+            profile.start()
+            g.profile = profile
+        except ValueError:
+            pass  # another request on this process is already being profiled
+
+
+@app.after_request
+def finish_request_timer(response):
+    elapsed = time.perf_counter() - g.pop('request_start', time.perf_counter())
+    metrics.observe_request(request.endpoint, request.method, response.status_code, elapsed)
+    profile = g.pop('profile', None)
+    if profile is not None:
+        response.headers['X-Profile'] = profile.stop(request.endpoint or 'unknown', elapsed)
+    return response
+
+
+def timed(name):
+    # Stage timer whose timings also land in the request's profile, if any
+    profile = g.get('profile') if has_request_context() else None
+    return stage(name, profile.timings if profile is not None else None)
+
+
+def profiling_requested():
+    return 'profile' in g
 
 
 @app.route('/')
@@ -18,66 +79,395 @@ def index():
 @app.route('/upload', methods=['POST'])
 def upload():
     file = request.files['file']
-    filepath = os.path.join(app.config['UPLOAD_FOLDER'], file.filename)
-    file.save(filepath)
-
-    # Read CSV
-    df = pd.read_csv(filepath)
-    df['Date'] = pd.to_datetime(df['Date'])
-
-    # Calculations
-    df['Revenue'] = df['Units_Sold'] * df['Price']
-    total_sales = df['Revenue'].sum()
-    top_product = df.groupby('Product')['Units_Sold'].sum().idxmax()
-    top_revenue_product = df.groupby('Product')['Revenue'].sum().idxmax()
-    low_stock_items = df[df['Stock'] < 10]['Product'].tolist()
-    high_demand = df.groupby('Product')['Units_Sold'].sum().nlargest(3).index.tolist()
-
-    # Monthly trends
-    monthly_sales = df.groupby(df['Date'].dt.strftime('%B'))['Units_Sold'].sum().to_dict()
-
-    # Predict next 3 months
-    monthly = df.groupby(df['Date'].dt.month)['Units_Sold'].sum()
-    X = np.array(monthly.index).reshape(-1, 1)
-    y = monthly.values
-    model = LinearRegression()
-    model.fit(X, y)
-    predictions = {f'Month {i}': int(model.predict([[max(X)[0] + i]])[0]) for i in range(1, 4)}
-
-    # Insights
-    best_day = df.groupby(df['Date'].dt.day_name())['Units_Sold'].sum().idxmax()
-    insights = [
-        f"Best-selling product: {top_product}",
-        f"Highest revenue product: {top_revenue_product}",
-        f"Best day for sales: {best_day}",
-        f"Total revenue generated: ₹{int(total_sales)}"
-    ]
+    tmp_path = os.path.join(app.config['UPLOAD_FOLDER'], f'{uuid.uuid4().hex}.tmp')
+    with timed('save_upload'):
+        digest = save_and_hash(file, tmp_path)
+    arrow_path = upload_arrow_path(digest)
 
-    # Summary CSV
-    summary = pd.DataFrame({
-        'Metric': ['Total Sales', 'Top Product', 'Highest Revenue Product', 'Best Day'],
-        'Value': [total_sales, top_product, top_revenue_product, best_day]
+    with timed('cache_lookup'):
+        cached = os.path.exists(arrow_path) and result_cache.get(payload_cache_key(digest)) is not None
+    if cached:
+        os.remove(tmp_path)
+        return redirect(url_for('analysis', digest=digest))
+
+    # Parsing and analysis run on the worker pool; the request returns straight away
+    job_id = job_queue.active(digest)
+    if job_id is not None:
+        os.remove(tmp_path)
+    else:
+        csv_path = os.path.join(app.config['UPLOAD_FOLDER'], f'{digest}.csv')
+        os.replace(tmp_path, csv_path)
+        try:
+            with timed('submit_job'):
+                job_id = job_queue.submit(
+                    digest, run_upload_analysis, csv_path, arrow_path, app.config['INGEST_BLOCK_SIZE'],
+                    profiling_requested(),
+                    on_done=lambda future: finish_upload_job(future, digest, csv_path),
+                    meta={'dashboard_url': url_for('analysis', digest=digest)},
+                )
+        except QueueFull as e:
+            os.remove(csv_path)
+            return jsonify({'error': str(e)}), 503
+
+    return job_accepted(job_id)
+
+
+def finish_upload_job(future, digest, csv_path):
+    if future.exception() is None:
+        result = future.result()
+        record(result['timings'])
+        result_cache.put(payload_cache_key(digest), result['payload'])
+    try:
+        os.remove(csv_path)
+    except OSError:
+        pass
+
+
+def payload_cache_key(digest):
+    return f'{digest}-v{PAYLOAD_VERSION}'
+
+
+def job_accepted(job_id):
+    if request.accept_mimetypes.best_match(['text/html', 'application/json']) == 'application/json':
+        return jsonify(job_status_payload(job_id)), 202
+    return redirect(url_for('job_view', job_id=job_id))
+
+
+@app.route('/upload/batch', methods=['POST'])
+def upload_batch():
+    files = [f for f in request.files.getlist('files') if f.filename]
+    if not files:
+        abort(400)
+
+    batch_dir = os.path.join(app.config['UPLOAD_FOLDER'], 'batches', uuid.uuid4().hex)
+    os.makedirs(batch_dir)
+    paths, digests = [], []
+    with timed('save_upload'):
+        for i, file in enumerate(files):
+            name = secure_filename(file.filename) or f'store_{i}.csv'
+            path = os.path.join(batch_dir, name)
+            if os.path.exists(path):
+                path = os.path.join(batch_dir, f'{os.path.splitext(name)[0]}-{i}.csv')
+            digests.append(f'{os.path.basename(path)}:{save_and_hash(file, path)}')
+            paths.append(path)
+
+    # The batch is addressed by its stores' names and contents, like a single upload
+    key = hashlib.sha256('\n'.join(sorted(digests)).encode()).hexdigest()
+    if result_cache.get(payload_cache_key(key)) is not None:
+        shutil.rmtree(batch_dir, ignore_errors=True)
+        return redirect(url_for('batch_dashboard', key=key))
+
+    try:
+        job_id = job_queue.submit(
+            key, run_batch_analysis, paths, app.config['BATCH_WORKERS'], app.config['INGEST_BLOCK_SIZE'],
+            on_done=lambda future: finish_batch_job(future, key, batch_dir),
+            meta={'dashboard_url': url_for('batch_dashboard', key=key)},
+        )
+    except QueueFull as e:
+        shutil.rmtree(batch_dir, ignore_errors=True)
+        return jsonify({'error': str(e)}), 503
+    return job_accepted(job_id)
+
+
+def finish_batch_job(future, key, batch_dir):
+    if future.exception() is None:
+        result = future.result()
+        record(result['timings'])
+        result_cache.put(payload_cache_key(key), result['payload'])
+    shutil.rmtree(batch_dir, ignore_errors=True)
+
+
+@app.route('/batches/<key>')
+def batch_dashboard(key):
+    return render_dashboard(cached_batch_payload(key), report_url=url_for('batch_download', key=key))
+
+
+@app.route('/batches/<key>/download')
+def batch_download(key):
+    report_dir = os.path.join(app.config['UPLOAD_FOLDER'], 'reports')
+    os.makedirs(report_dir, exist_ok=True)
+    report_path = os.path.abspath(os.path.join(report_dir, f'batch-{key}.csv'))
+    write_batch_report(cached_batch_payload(key), report_path)
+    return send_file(report_path, as_attachment=True, download_name='report.csv')
+
+
+def cached_batch_payload(key):
+    # Batch results only live in the cache; the per-store files are not kept
+    payload = result_cache.get(payload_cache_key(key)) if DIGEST_RE.match(key) else None
+    if payload is None:
+        abort(404)
+    return payload
+
+
+@app.route('/jobs')
+def jobs_stats():
+    return jsonify(job_queue.stats())
+
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    status = job_status_payload(job_id)
+    if status is None:
+        abort(404)
+    return jsonify(status)
+
+
+@app.route('/jobs/<job_id>/result')
+def job_result(job_id):
+    status = job_status_payload(job_id)
+    if status is None:
+        abort(404)
+    if status['state'] == 'failed':
+        return jsonify(status), 500
+    if status['state'] != 'done':
+        return jsonify(status), 202
+    return jsonify(job_queue.result(job_id)['payload'])
+
+
+@app.route('/jobs/<job_id>/view')
+def job_view(job_id):
+    if job_queue.get(job_id) is None:
+        abort(404)
+    return render_template('job.html', status_url=url_for('job_status', job_id=job_id))
+
+
+def job_status_payload(job_id):
+    status = job_queue.status(job_id)
+    if status is not None:
+        status['result_url'] = url_for('job_result', job_id=job_id)
+    return status
+
+
+@app.route('/analysis/<digest>')
+def analysis(digest):
+    return render_dashboard(upload_payload(digest), report_url=f'/analysis/{digest}/download',
+                            table_url=f'/analysis/{digest}/table')
+
+
+@app.route('/analysis/<digest>/forecast')
+def analysis_forecast(digest):
+    return forecast_response(upload_payload(digest))
+
+
+@app.route('/analysis/<digest>/query')
+def analysis_query(digest):
+    arrow_path = upload_arrow_path(digest)
+    if not DIGEST_RE.match(digest) or not os.path.exists(arrow_path):
+        abort(404)
+    path = cube_path(arrow_path)
+    if not os.path.exists(path):
+        # Uploads analysed before cubes existed get one built from their Arrow file
+        cube = RollupCube()
+        aggregate_arrow([arrow_path], cube=cube)
+        cube.save(path)
+    return rollup_response(path)
+
+
+@app.route('/analysis/<digest>/table')
+def analysis_table(digest):
+    arrow_path = upload_arrow_path(digest)
+    if not DIGEST_RE.match(digest) or not os.path.exists(arrow_path):
+        abort(404)
+    return table_response([arrow_path])
+
+
+@app.route('/analysis/<digest>/download')
+def analysis_download(digest):
+    report_dir = os.path.join(app.config['UPLOAD_FOLDER'], 'reports')
+    os.makedirs(report_dir, exist_ok=True)
+    report_path = os.path.abspath(os.path.join(report_dir, f'{digest}.csv'))
+    write_report(upload_payload(digest), report_path)
+    return send_file(report_path, as_attachment=True, download_name='report.csv')
+
+
+def upload_arrow_path(digest):
+    return os.path.join(app.config['UPLOAD_FOLDER'], f'{digest}.arrow')
+
+
+def upload_payload(digest, agg=None):
+    if not DIGEST_RE.match(digest):
+        abort(404)
+
+    # Repeat uploads of the same content render straight from the cache
+    cache_key = payload_cache_key(digest)
+    with timed('cache_lookup'):
+        payload = result_cache.get(cache_key)
+    if payload is None:
+        if agg is None:
+            arrow_path = upload_arrow_path(digest)
+            if not os.path.exists(arrow_path):
+                abort(404)
+            with timed('aggregate_arrow'):
+                agg = aggregate_arrow([arrow_path])
+        with timed('dashboard_payload'):
+            payload = dashboard_payload(agg)
+        result_cache.put(cache_key, payload)
+    return payload
+
+
+@app.route('/datasets/append', methods=['POST'])
+def append_dataset():
+    file = request.files['file']
+    dataset_id = dataset_id_for(request.form.get('dataset') or file.filename)
+    dataset_dir = dataset_store.dataset_dir(dataset_id)
+    os.makedirs(dataset_dir, exist_ok=True)
+
+    tmp_path = os.path.join(dataset_dir, f'{uuid.uuid4().hex}.tmp')
+    with timed('save_upload'):
+        digest = save_and_hash(file, tmp_path)
+
+    # Only the delta rows are read; history lives in the stored running totals and rollup cube
+    try:
+        with dataset_store.lock(dataset_id):
+            agg, applied = dataset_store.load(dataset_id)
+            if agg is None:
+                agg = SalesAggregate()
+            if digest not in applied:
+                cube = dataset_cube(dataset_id, applied)
+                part_path = os.path.join(dataset_dir, f'part-{digest}.arrow')
+                delta_cube = RollupCube()
+                try:
+                    with timed('ingest'):
+                        agg.merge(ingest_csv(tmp_path, part_path, SalesAggregate(),
+                                             block_size=app.config['INGEST_BLOCK_SIZE'], cube=delta_cube))
+                    applied.append(digest)
+                    # aggregate.json is the record of what was applied; it is written first
+                    dataset_store.save(dataset_id, agg, applied)
+                except Exception:
+                    if os.path.exists(part_path):
+                        os.remove(part_path)
+                    raise
+                # A cube left behind by a crash here no longer matches `applied` and is rebuilt from the parts
+                with timed('cube_save'):
+                    cube.merge(delta_cube).save(dataset_cube_path(dataset_id), sources=applied)
+    finally:
+        os.remove(tmp_path)
+
+    with timed('dashboard_payload'):
+        payload = dashboard_payload(agg)
+    return render_dashboard(payload, table_url=f'/datasets/{dataset_id}/table')
+
+
+@app.route('/datasets/<dataset_id>')
+def dataset_dashboard(dataset_id):
+    dataset_id = dataset_id_for(dataset_id)
+    agg, _ = dataset_store.load(dataset_id)
+    if agg is None:
+        abort(404)
+    return render_dashboard(dashboard_payload(agg), table_url=f'/datasets/{dataset_id}/table')
+
+
+@app.route('/datasets/<dataset_id>/forecast')
+def dataset_forecast(dataset_id):
+    agg, _ = dataset_store.load(dataset_id_for(dataset_id))
+    if agg is None:
+        abort(404)
+    return forecast_response(dashboard_payload(agg))
+
+
+def forecast_response(payload):
+    return jsonify({
+        'months': list(payload['predictions']),
+        'total': list(payload['predictions'].values()),
+        'products': payload['product_predictions'],
     })
+
+
+@app.route('/datasets/<dataset_id>/query')
+def dataset_query(dataset_id):
+    dataset_id = dataset_id_for(dataset_id)
+    if not os.path.isdir(dataset_store.dataset_dir(dataset_id)):
+        abort(404)
+    path = dataset_cube_path(dataset_id)
+    _, applied = dataset_store.load(dataset_id)
+    if not os.path.exists(path) or load_cached(path).sources != applied:
+        with dataset_store.lock(dataset_id):
+            _, applied = dataset_store.load(dataset_id)
+            cube = dataset_cube(dataset_id, applied)
+            if cube.sources != applied:
+                cube.save(path, sources=applied)
+    return rollup_response(path)
+
+
+def dataset_cube_path(dataset_id):
+    return os.path.join(dataset_store.dataset_dir(dataset_id), 'rollup.cube')
+
+
+def dataset_cube(dataset_id, applied):
+    path = dataset_cube_path(dataset_id)
+    if os.path.exists(path):
+        cube = RollupCube.load(path)
+        if cube.sources == applied:
+            return cube
+    # Missing (datasets from before cubes) or out of step with the applied deltas: roll up the parts again
+    cube = RollupCube()
+    aggregate_arrow(dataset_store.parts(dataset_id), cube=cube)
+    return cube
+
+
+def rollup_response(path):
+    # Answered from the precomputed cube, never from the raw rows
+    try:
+        query = parse_rollup_query(request.args)
+        with timed('rollup_query'):
+            result = load_cached(path).query(**query)
+    except RollupQueryError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({
+        'start': None if query['start'] is None else str(query['start']),
+        'end': None if query['end'] is None else str(query['end']),
+        'products': query['products'],
+        'group': query['group'],
+        'result': result,
+    })
+
+
+@app.route('/datasets/<dataset_id>/table')
+def dataset_table(dataset_id):
+    dataset_id = dataset_id_for(dataset_id)
+    if not os.path.isdir(dataset_store.dataset_dir(dataset_id)):
+        abort(404)
+    return table_response(dataset_store.parts(dataset_id))
+
+
+def table_response(paths):
+    # One page of rows as JSON, so response size is independent of the dataset
+    try:
+        query = parse_query(request.args)
+    except TableQueryError as e:
+        return jsonify({'error': str(e)}), 400
+    with timed('table_query'):
+        page = query_page(paths, **query)
+    return jsonify(page)
+
+
+def render_dashboard(payload, report_url='/download', table_url=None):
+    # Summary CSV
     summary_path = os.path.join(app.config['UPLOAD_FOLDER'], 'report.csv')
-    summary.to_csv(summary_path, index=False)
-
-    # Top 5 Products by Revenue
-    top_products_revenue = df.groupby('Product')['Revenue'].sum().nlargest(5)
-
-    return render_template(
-        'dashboard.html',
-        table=df.to_html(classes='table table-striped', index=False),
-        total_sales=total_sales,
-        top_product=top_product,
-        low_stock_items=low_stock_items,
-        high_demand=high_demand,
-        month_labels=list(monthly_sales.keys()),
-        month_values=list(monthly_sales.values()),
-        insights=insights,
-        predictions=predictions,
-        top_products=top_products_revenue.index.tolist(),
-        top_revenue_values=top_products_revenue.values.tolist()
-    )
+    with timed('write_report'):
+        write_report(payload, summary_path)
+
+    with timed('render_template'):
+        return render_template('dashboard.html', report_url=report_url, table_url=table_url, **payload)
+
+
+@app.route('/cache/stats')
+def cache_stats():
+    return jsonify(result_cache.stats())
+
+
+@app.route('/metrics')
+def prometheus_metrics():
+    cache = result_cache.stats()
+    jobs = job_queue.stats()
+    extra = [
+        ('retailintel_cache_hits_total', 'counter', 'Result cache hits.', cache['hits']),
+        ('retailintel_cache_misses_total', 'counter', 'Result cache misses.', cache['misses']),
+        ('retailintel_cache_entries', 'gauge', 'Payloads held in the result cache.', cache['entries']),
+        ('retailintel_jobs_queued', 'gauge', 'Analysis jobs waiting for a worker.', jobs['queued']),
+        ('retailintel_jobs_running', 'gauge', 'Analysis jobs currently running.', jobs['running']),
+    ]
+    return metrics.render(extra), 200, {'Content-Type': 'text/plain; version=0.0.4'}
 
 
 @app.route('/download')
@@ -0,0 +1,102 @@
+"""Replay synthetic sales CSVs of increasing size against the Flask app.
+
+    python bench_app.py [--rows 10000 100000 1000000] [--seed 7] [--profile]
+
+Runs in a throwaway working directory, so nothing is written to uploads/.
+Prints upload latency, end-to-end analysis time and dashboard render time for
+each size, followed by the per-stage breakdown from /metrics.
+"""
+import argparse
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+PRODUCTS = ['Rice', 'Wheat', 'Sugar', 'Oil', 'Milk', 'Tea', 'Coffee', 'Soap', 'Shampoo', 'Biscuits',
+            'Salt', 'Dal', 'Butter', 'Bread', 'Eggs', 'Juice', 'Detergent', 'Toothpaste', 'Noodles', 'Flour']
+
+
+def synthetic_csv(rows, seed):
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame({
+        'Date': pd.Timestamp('2025-01-01') + pd.to_timedelta(rng.integers(0, 365, rows), unit='D'),
+        'Product': rng.choice(PRODUCTS, rows),
+        'Units_Sold': rng.integers(1, 50, rows),
+        'Price': rng.integers(10, 500, rows),
+        'Stock': rng.integers(0, 200, rows),
+    }).sort_values('Date')
+    return frame.to_csv(index=False, date_format='%Y-%m-%d').encode()
+
+
+def timed_get(client, url):
+    start = time.perf_counter()
+    response = client.get(url)
+    return response, time.perf_counter() - start
+
+
+def run_size(client, rows, seed, profile):
+    data = synthetic_csv(rows, seed)
+    query = '?profile=1' if profile else ''
+
+    start = time.perf_counter()
+    response = client.post(f'/upload{query}', data={'file': (io.BytesIO(data), f'sales_{rows}.csv')},
+                           headers={'Accept': 'application/json'}, content_type='multipart/form-data')
+    upload_seconds = time.perf_counter() - start
+    if response.status_code != 202:
+        raise RuntimeError(f'upload of {rows} rows returned {response.status_code}')
+
+    status = response.get_json()
+    while status['state'] not in ('done', 'failed'):
+        time.sleep(0.05)
+        status = client.get(f'/jobs/{status["id"]}').get_json()
+    if status['state'] == 'failed':
+        raise RuntimeError(f'analysis of {rows} rows failed: {status["error"]}')
+    total_seconds = time.perf_counter() - start
+
+    _, render_seconds = timed_get(client, f'{status["dashboard_url"]}{query}')
+    _, repeat_seconds = timed_get(client, status['dashboard_url'])
+    print(f'{rows:>12,} {len(data) / 1e6:>8.1f} {upload_seconds * 1000:>11.1f} {total_seconds * 1000:>11.1f} '
+          f'{render_seconds * 1000:>11.1f} {repeat_seconds * 1000:>11.1f}')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--profile', action='store_true', help='also collect cProfile/tracemalloc dumps')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='retailintel-bench-app-')
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        # The app keeps its uploads relative to the working directory
+        sys.path.insert(0, APP_DIR)
+        from app import app
+
+        client = app.test_client()
+        print(f'{"rows":>12} {"CSV MB":>8} {"upload ms":>11} {"analysis ms":>11} {"render ms":>11} {"cached ms":>11}')
+        for i, rows in enumerate(args.rows):
+            run_size(client, rows, args.seed + i, args.profile)
+
+        print('\nStage breakdown (from /metrics):')
+        for line in client.get('/metrics').get_data(as_text=True).splitlines():
+            if line.startswith(('retailintel_stage_seconds_sum', 'retailintel_stage_peak_memory_bytes')):
+                print(f'  {line}')
+        if args.profile:
+            target = os.path.join(cwd, 'bench_profiles')
+            shutil.copytree(os.path.join('uploads', 'profiles'), target, dirs_exist_ok=True)
+            print(f'\nRequest profiles (.prof for snakeviz/pstats, .json summaries) copied to {target}')
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""Compare CSV and Arrow load times on RetailIntel_SalesData_2025.csv scaled up.
+
+    python bench_columnar.py [--scale 100] [--repeat 3]
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import pandas as pd
+
+from analytics import COLUMNS, DTYPES, aggregate_csv
+from columnar import aggregate_arrow, ingest_csv, read_table
+
+SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'RetailIntel_SalesData_2025.csv')
+
+
+def best_of(repeat, fn):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scale', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='retailintel-bench-')
+    try:
+        csv_path = os.path.join(workdir, 'sales.csv')
+        arrow_path = os.path.join(workdir, 'sales.arrow')
+        with open(SOURCE, encoding='utf-8') as f:
+            header = f.readline()
+            body = f.read()
+        with open(csv_path, 'w', encoding='utf-8') as f:
+            f.write(header)
+            for _ in range(args.scale):
+                f.write(body)
+
+        rows = body.count('\n') * args.scale
+        print(f'{rows:,} rows, CSV {os.path.getsize(csv_path) / 1e6:.1f} MB')
+
+        convert = best_of(1, lambda: ingest_csv(csv_path, arrow_path))
+        print(f'{"one-time CSV -> Arrow conversion":<42}{convert * 1000:>10.1f} ms'
+              f'  (Arrow {os.path.getsize(arrow_path) / 1e6:.1f} MB)')
+
+        results = [
+            ('pd.read_csv (all columns, inferred)', lambda: pd.read_csv(csv_path)),
+            ('pd.read_csv (explicit dtypes)', lambda: pd.read_csv(csv_path, usecols=COLUMNS, dtype=DTYPES, parse_dates=['Date'])),
+            ('Arrow mmap, all columns', lambda: read_table([arrow_path])),
+            ('Arrow mmap, Product + Units_Sold', lambda: read_table([arrow_path], ['Product', 'Units_Sold'])),
+            ('Arrow mmap -> pandas, all columns', lambda: read_table([arrow_path]).to_pandas()),
+            ('aggregate_csv (chunked CSV)', lambda: aggregate_csv(csv_path)),
+            ('aggregate_arrow (mmap batches)', lambda: aggregate_arrow([arrow_path])),
+        ]
+        for label, fn in results:
+            print(f'{label:<42}{best_of(args.repeat, fn) * 1000:>10.1f} ms')
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
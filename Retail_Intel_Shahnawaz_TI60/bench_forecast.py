@@ -0,0 +1,57 @@
+"""Compare the batched NumPy forecast with a per-product sklearn loop.
+
+    python bench_forecast.py [--products 5000] [--months 12] [--repeat 3]
+"""
+import argparse
+import time
+
+import numpy as np
+from sklearn.linear_model import LinearRegression
+
+from forecast import FORECAST_MONTHS, forecast_matrix
+
+
+def sklearn_loop(units, months, horizon):
+    X = months.reshape(-1, 1)
+    future = (months.max() + np.arange(1, horizon + 1)).reshape(-1, 1)
+    predictions = np.empty((units.shape[0], horizon))
+    for i, y in enumerate(units):
+        model = LinearRegression()
+        model.fit(X, y)
+        predictions[i] = model.predict(future)
+    return predictions
+
+
+def best_of(repeat, fn):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--products', type=int, default=5000)
+    parser.add_argument('--months', type=int, default=12)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    months = np.arange(1, args.months + 1)
+    trend = rng.normal(0, 5, size=(args.products, 1)) * months
+    units = np.maximum(rng.normal(500, 100, size=(args.products, 1)) + trend
+                       + rng.normal(0, 20, size=(args.products, args.months)), 0).round()
+
+    loop_time, expected = best_of(args.repeat, lambda: sklearn_loop(units, months, FORECAST_MONTHS))
+    batch_time, actual = best_of(args.repeat, lambda: forecast_matrix(units, months, FORECAST_MONTHS))
+
+    print(f'{args.products:,} products x {args.months} months, {FORECAST_MONTHS}-month horizon')
+    print(f'{"sklearn LinearRegression per product":<40}{loop_time * 1000:>10.1f} ms')
+    print(f'{"forecast_matrix (one lstsq)":<40}{batch_time * 1000:>10.1f} ms')
+    print(f'speed-up {loop_time / batch_time:.0f}x, max abs difference {np.abs(expected - actual).max():.2e}')
+
+
+if __name__ == '__main__':
+    main()
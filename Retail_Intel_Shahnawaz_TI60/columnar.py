@@ -0,0 +1,107 @@
+import os
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+
+from analytics import COLUMNS, SalesAggregate
+
+BLOCK_SIZE = 8 * 1024 * 1024  # bytes of CSV text parsed per batch
+
+# Arrow IPC files are written uncompressed so they can be memory-mapped and read zero-copy
+SCHEMA = pa.schema([
+    ('Date', pa.timestamp('ms')),
+    ('Product', pa.string()),
+    ('Units_Sold', pa.int32()),
+    ('Price', pa.int32()),
+    ('Stock', pa.int32()),
+])
+
+
+def read_csv_batches(csv_path, block_size=BLOCK_SIZE, use_threads=True):
+    return pa_csv.open_csv(
+        csv_path,
+        read_options=pa_csv.ReadOptions(block_size=block_size, use_threads=use_threads),
+        convert_options=pa_csv.ConvertOptions(
+            column_types={field.name: field.type for field in SCHEMA},
+            include_columns=SCHEMA.names,
+        ),
+    )
+
+
+def ingest_csv(csv_path, arrow_path, agg=None, block_size=BLOCK_SIZE, progress=None, cube=None):
+    # Parse the CSV once, batch by batch, into an Arrow file (and optionally an aggregate and rollup cube)
+    total_bytes = os.path.getsize(csv_path) or 1
+    reader = read_csv_batches(csv_path, block_size)
+    tmp_path = f'{arrow_path}.tmp'
+    try:
+        with pa.OSFile(tmp_path, 'wb') as sink, pa.ipc.new_file(sink, SCHEMA) as writer:
+            for i, batch in enumerate(reader, start=1):
+                batch = batch.select(SCHEMA.names)
+                writer.write_batch(batch)
+                if agg is not None or cube is not None:
+                    frame = batch_to_frame(batch)
+                    if agg is not None:
+                        agg.update(frame)
+                    if cube is not None:
+                        cube.update(frame)
+                if progress is not None:
+                    # Each batch is parsed from roughly one block of CSV text
+                    progress(min(i * block_size / total_bytes, 0.99))
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, arrow_path)
+    return agg
+
+
+def batch_to_frame(batch):
+    # Product comes back as a pandas categorical, like the CSV reader's dtypes
+    columns = {}
+    for name in batch.schema.names:
+        column = batch.column(name)
+        if name == 'Product':
+            column = pc.dictionary_encode(column)
+        columns[name] = column
+    return pa.table(columns).to_pandas()
+
+
+def iter_batches(paths, columns=COLUMNS):
+    for path in paths:
+        with pa.memory_map(path, 'r') as source:
+            reader = pa.ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                yield reader.get_batch(i).select(columns)
+
+
+def read_table(paths, columns=COLUMNS):
+    # Zero-copy: the returned table references the mapped pages directly
+    tables = []
+    for path in paths:
+        source = pa.memory_map(path, 'r')
+        tables.append(pa.ipc.open_file(source).read_all().select(columns))
+    if not tables:
+        return SCHEMA.empty_table().select(columns)
+    return pa.concat_tables(tables)
+
+
+def aggregate_csv_batches(csv_path, block_size=BLOCK_SIZE, use_threads=True):
+    agg = SalesAggregate()
+    for batch in read_csv_batches(csv_path, block_size, use_threads):
+        agg.update(batch_to_frame(batch.select(SCHEMA.names)))
+    return agg
+
+
+def aggregate_arrow(paths, cube=None):
+    agg = SalesAggregate()
+    for batch in iter_batches(paths):
+        frame = batch_to_frame(batch)
+        agg.update(frame)
+        if cube is not None:
+            cube.update(frame)
+    return agg
+
+
+def cube_path(arrow_path):
+    return f'{os.path.splitext(arrow_path)[0]}.cube'
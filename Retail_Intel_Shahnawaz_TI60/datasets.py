@@ -0,0 +1,53 @@
+import json
+import os
+import threading
+
+from werkzeug.utils import secure_filename
+
+from analytics import SalesAggregate
+
+
+class DatasetStore:
+    """Persistent running aggregates for datasets that grow by daily deltas.
+
+    Each dataset lives in its own folder holding ``aggregate.json``; appending
+    a delta merges only the new rows into it, so history is never re-read.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def dataset_dir(self, dataset_id):
+        return os.path.join(self.root, dataset_id)
+
+    def lock(self, dataset_id):
+        with self._locks_guard:
+            return self._locks.setdefault(dataset_id, threading.Lock())
+
+    def load(self, dataset_id):
+        path = os.path.join(self.dataset_dir(dataset_id), 'aggregate.json')
+        if not os.path.exists(path):
+            return None, []
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        return SalesAggregate.from_dict(data['aggregate']), data['applied']
+
+    def parts(self, dataset_id):
+        # Arrow parts in the order their deltas were appended
+        _, applied = self.load(dataset_id)
+        paths = [os.path.join(self.dataset_dir(dataset_id), f'part-{digest}.arrow') for digest in applied]
+        return [path for path in paths if os.path.exists(path)]
+
+    def save(self, dataset_id, agg, applied):
+        path = os.path.join(self.dataset_dir(dataset_id), 'aggregate.json')
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'aggregate': agg.to_dict(), 'applied': applied}, f)
+        os.replace(tmp_path, path)
+
+
+def dataset_id_for(name):
+    return secure_filename(os.path.splitext(name)[0]) or 'default'
@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+
+FORECAST_MONTHS = 3
+
+
+def forecast_matrix(units, months, horizon=FORECAST_MONTHS):
+    """Least-squares linear trend for every row of a (series x month) matrix at once.
+
+    ``units`` is ``(n_series, n_months)``, ``months`` the shared month numbers.
+    Returns the next ``horizon`` months as ``(n_series, horizon)``. Month
+    numbers are centred first, which keeps a single month well defined (a flat
+    forecast) and gives the same fit as sklearn's LinearRegression.
+    """
+    units = np.asarray(units, dtype=float)
+    months = np.asarray(months, dtype=float)
+    centre = months.mean()
+    X = np.column_stack([np.ones_like(months), months - centre])
+    coef, *_ = np.linalg.lstsq(X, units.T, rcond=None)
+
+    future = months.max() + np.arange(1, horizon + 1)
+    X_future = np.column_stack([np.ones(horizon), future - centre])
+    return (X_future @ coef).T
+
+
+def forecast_products(product_months, horizon=FORECAST_MONTHS):
+    # product_months: DataFrame of units, products as rows and month numbers as columns
+    product_months = product_months.sort_index(axis=1)
+    predictions = forecast_matrix(product_months.values, product_months.columns, horizon)
+    return pd.DataFrame(predictions, index=product_months.index,
+                        columns=[f'Month {i}' for i in range(1, horizon + 1)])
+
+
+def forecast_total(month_units, horizon=FORECAST_MONTHS):
+    month_units = month_units.sort_index()
+    predictions = forecast_matrix(month_units.values[np.newaxis, :], month_units.index, horizon)[0]
+    return {f'Month {i}': int(v) for i, v in enumerate(predictions, start=1)}
@@ -0,0 +1,146 @@
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+from analytics import SalesAggregate, dashboard_payload
+from columnar import BLOCK_SIZE, aggregate_arrow, cube_path, ingest_csv
+from profiling import stage, traced
+from rollup import RollupCube
+
+FINISHED_JOB_TTL = 3600
+
+
+class QueueFull(Exception):
+    pass
+
+
+def run_upload_analysis(job_id, progress, csv_path, arrow_path, block_size=BLOCK_SIZE, trace_memory=False):
+    # Runs in a worker process; progress is a manager dict shared with the web process.
+    # Stage timings go back with the payload so the web process can publish them.
+    def report(fraction):
+        progress[job_id] = fraction
+
+    report(0.0)
+    timings = []
+    with traced(trace_memory):
+        cube = RollupCube()
+        if os.path.exists(arrow_path):
+            with stage('aggregate_arrow', timings):
+                agg = aggregate_arrow([arrow_path], cube=cube)
+        else:
+            with stage('ingest', timings):
+                agg = ingest_csv(csv_path, arrow_path, SalesAggregate(), block_size=block_size, progress=report, cube=cube)
+        with stage('cube_save', timings):
+            cube.save(cube_path(arrow_path))
+        with stage('dashboard_payload', timings):
+            payload = dashboard_payload(agg)
+    report(1.0)
+    return {'payload': payload, 'timings': timings}
+
+
+class JobQueue:
+    """Analysis jobs on a local process pool, with no external broker.
+
+    ``max_workers`` caps how many jobs run at once; ``max_queued`` caps how
+    many may be waiting or running before new submissions are refused.
+    """
+
+    def __init__(self, max_workers=2, max_queued=16):
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self._executor = None
+        self._manager = None
+        self._progress = None
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def _start(self):
+        # Started lazily so importing the app (or the reloader) does not fork workers
+        if self._executor is None:
+            self._manager = multiprocessing.Manager()
+            self._progress = self._manager.dict()
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+
+    def submit(self, key, fn, *args, on_done=None, meta=None):
+        with self._lock:
+            self._prune()
+            job_id = self.active(key)
+            if job_id is not None:
+                return job_id
+            pending = sum(1 for job in self._jobs.values() if job['finished_at'] is None)
+            if pending >= self.max_queued:
+                raise QueueFull(f'{pending} analysis jobs already queued')
+
+            self._start()
+            job_id = uuid.uuid4().hex
+            future = self._executor.submit(fn, job_id, self._progress, *args)
+            self._jobs[job_id] = {'key': key, 'future': future, 'meta': meta or {},
+                                  'submitted_at': time.time(), 'finished_at': None}
+
+        def done(f):
+            # A job only counts as finished once its callback (e.g. caching) has run,
+            # even if that callback fails, or it would hold a queue slot forever
+            try:
+                if on_done is not None:
+                    on_done(f)
+            finally:
+                self._jobs[job_id]['finished_at'] = time.time()
+        future.add_done_callback(done)
+        return job_id
+
+    def active(self, key):
+        for job_id, job in list(self._jobs.items()):
+            if job['key'] == key and job['finished_at'] is None:
+                return job_id
+        return None
+
+    def _prune(self):
+        now = time.time()
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job['finished_at'] is not None and now - job['finished_at'] > FINISHED_JOB_TTL]
+        for job_id in expired:
+            del self._jobs[job_id]
+            self._progress.pop(job_id, None)
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def status(self, job_id):
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        future = job['future']
+        progress = self._progress.get(job_id, 0.0)
+        if job['finished_at'] is None:
+            state = 'running' if future.running() and job_id in self._progress else 'queued'
+        elif future.exception() is not None:
+            state = 'failed'
+        else:
+            state = 'done'
+            progress = 1.0
+        status = {
+            'id': job_id,
+            'key': job['key'],
+            'state': state,
+            'progress': round(progress, 3),
+            'submitted_at': job['submitted_at'],
+            'finished_at': job['finished_at'],
+            **job['meta'],
+        }
+        if state == 'failed':
+            status['error'] = str(future.exception())
+        return status
+
+    def result(self, job_id):
+        return self._jobs[job_id]['future'].result()
+
+    def stats(self):
+        states = [self.status(job_id)['state'] for job_id in list(self._jobs)]
+        return {
+            'max_workers': self.max_workers,
+            'max_queued': self.max_queued,
+            **{state: states.count(state) for state in ('queued', 'running', 'done', 'failed')},
+        }
@@ -0,0 +1,156 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+class Metrics:
+    """Per-stage and per-endpoint timings, rendered in Prometheus text format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stages = {}
+        self.requests = {}
+
+    def observe_stage(self, name, seconds, peak_bytes=None):
+        with self._lock:
+            count, total, slowest, peak = self.stages.get(name, (0, 0.0, 0.0, None))
+            if peak_bytes is not None:
+                peak = peak_bytes if peak is None else max(peak, peak_bytes)
+            self.stages[name] = (count + 1, total + seconds, max(slowest, seconds), peak)
+
+    def observe_request(self, endpoint, method, status, seconds):
+        key = (endpoint or 'unknown', method, str(status))
+        with self._lock:
+            count, total = self.requests.get(key, (0, 0.0))
+            self.requests[key] = (count + 1, total + seconds)
+
+    def render(self, extra=()):
+        lines = [
+            '# HELP retailintel_stage_seconds Time spent in each analysis stage.',
+            '# TYPE retailintel_stage_seconds summary',
+        ]
+        with self._lock:
+            stages = sorted(self.stages.items())
+            requests = sorted(self.requests.items())
+        for name, (count, total, _, _) in stages:
+            lines.append(f'retailintel_stage_seconds_sum{{stage="{name}"}} {total:.6f}')
+            lines.append(f'retailintel_stage_seconds_count{{stage="{name}"}} {count}')
+        lines += [
+            '# HELP retailintel_stage_seconds_max Slowest single run of each stage.',
+            '# TYPE retailintel_stage_seconds_max gauge',
+        ]
+        for name, (_, _, slowest, _) in stages:
+            lines.append(f'retailintel_stage_seconds_max{{stage="{name}"}} {slowest:.6f}')
+        lines += [
+            '# HELP retailintel_stage_peak_memory_bytes Peak Python allocations of each stage while profiling.',
+            '# TYPE retailintel_stage_peak_memory_bytes gauge',
+        ]
+        for name, (_, _, _, peak) in stages:
+            if peak is not None:
+                lines.append(f'retailintel_stage_peak_memory_bytes{{stage="{name}"}} {peak}')
+        lines += [
+            '# HELP retailintel_request_seconds Request latency by endpoint.',
+            '# TYPE retailintel_request_seconds summary',
+        ]
+        for (endpoint, method, status), (count, total) in requests:
+            labels = f'endpoint="{endpoint}",method="{method}",status="{status}"'
+            lines.append(f'retailintel_request_seconds_sum{{{labels}}} {total:.6f}')
+            lines.append(f'retailintel_request_seconds_count{{{labels}}} {count}')
+        extra = list(extra)
+        max_rss = max_rss_bytes()
+        if max_rss is not None:
+            extra.append(('retailintel_process_max_rss_bytes', 'gauge', 'Peak resident set size of this process.', max_rss))
+        for name, kind, help_text, value in extra:
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}', f'{name} {value}']
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics()
+
+
+def max_rss_bytes():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+
+@contextmanager
+def stage(name, timings=None):
+    # Memory is only measured while tracemalloc is on (i.e. when a profile is requested)
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] - baseline if tracing else None
+        metrics.observe_stage(name, elapsed, peak)
+        if timings is not None:
+            timings.append({'stage': name, 'seconds': round(elapsed, 6), 'peak_bytes': peak})
+
+
+@contextmanager
+def traced(enabled=True):
+    # tracemalloc around a whole worker job, so its stages report peak memory too
+    started = enabled and not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    try:
+        yield
+    finally:
+        if started:
+            tracemalloc.stop()
+
+
+def record(timings):
+    # Stage timings sent back from worker processes
+    for t in timings:
+        metrics.observe_stage(t['stage'], t['seconds'], t['peak_bytes'])
+
+
+class RequestProfile:
+    """cProfile plus tracemalloc for a single request, dumped to ``directory``."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.timings = []
+        self.profiler = cProfile.Profile()
+        self._started_tracing = False
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        self.profiler.enable()
+
+    def stop(self, name, elapsed):
+        self.profiler.disable()
+        peak = tracemalloc.get_traced_memory()[1]
+        if self._started_tracing:
+            tracemalloc.stop()
+
+        os.makedirs(self.directory, exist_ok=True)
+        base = os.path.join(self.directory, f'{time.strftime("%Y%m%d-%H%M%S")}-{name}-{os.getpid()}-{threading.get_ident()}')
+        self.profiler.dump_stats(f'{base}.prof')
+        report = io.StringIO()
+        pstats.Stats(self.profiler, stream=report).sort_stats('cumulative').print_stats(30)
+        with open(f'{base}.json', 'w', encoding='utf-8') as f:
+            json.dump({'request': name, 'seconds': round(elapsed, 6), 'peak_bytes': peak,
+                       'stages': self.timings, 'top_functions': report.getvalue()}, f, indent=2)
+        return f'{base}.json'
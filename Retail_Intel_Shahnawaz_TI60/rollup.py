@@ -0,0 +1,197 @@
+import calendar
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+GROUPS = ('total', 'product', 'day', 'week', 'month', 'weekday')
+MEASURES = ('units', 'revenue')
+LOADED_CUBES = 16
+
+
+class RollupQueryError(ValueError):
+    pass
+
+
+class RollupCube:
+    """Units and revenue per product per day, stored as prefix sums along the day axis.
+
+    Days form one contiguous range, so a date-range total for any set of
+    products is two lookups per product; coarser rollups (week, month,
+    weekday) are reduced from the per-day slice.
+    """
+
+    def __init__(self, products=(), first_day=None, units=None, revenue=None):
+        self.products = list(products)
+        self.first_day = first_day
+        self.units = units if units is not None else np.zeros((0, 0), dtype='int64')
+        self.revenue = revenue if revenue is not None else np.zeros((0, 0), dtype='int64')
+        # Optional record of what the cube was built from, saved with it
+        self.sources = None
+        self._cum = None
+
+    @property
+    def days(self):
+        if self.first_day is None:
+            return np.array([], dtype='datetime64[D]')
+        return self.first_day + np.arange(self.units.shape[1])
+
+    def update(self, chunk):
+        units = chunk['Units_Sold'].astype('int64')
+        frame = pd.DataFrame({'units': units, 'revenue': units * chunk['Price']})
+        grouped = frame.groupby([chunk['Product'], chunk['Date'].dt.normalize()], observed=True).sum()
+        products = grouped.index.get_level_values(0).astype(str)
+        days = grouped.index.get_level_values(1).values.astype('datetime64[D]')
+        self.merge(_from_rows(products, days, grouped['units'].values, grouped['revenue'].values))
+
+    def merge(self, other):
+        if other.first_day is None:
+            return self
+        if self.first_day is None:
+            self.products, self.first_day = list(other.products), other.first_day
+            self.units, self.revenue = other.units.copy(), other.revenue.copy()
+            self._cum = None
+            return self
+
+        products = sorted(set(self.products) | set(other.products))
+        first_day = min(self.first_day, other.first_day)
+        last_day = max(self.days[-1], other.days[-1])
+        shape = (len(products), int((last_day - first_day).astype(int)) + 1)
+        units, revenue = np.zeros(shape, dtype='int64'), np.zeros(shape, dtype='int64')
+        for cube in (self, other):
+            rows = np.searchsorted(products, cube.products)
+            start = int((cube.first_day - first_day).astype(int))
+            cols = slice(start, start + cube.units.shape[1])
+            units[rows, cols] += cube.units
+            revenue[rows, cols] += cube.revenue
+        self.products, self.first_day, self.units, self.revenue = products, first_day, units, revenue
+        self._cum = None
+        return self
+
+    def _cumulative(self):
+        if self._cum is None:
+            self._cum = {
+                name: np.concatenate([np.zeros((len(self.products), 1), dtype='int64'),
+                                      np.cumsum(getattr(self, name), axis=1)], axis=1)
+                for name in MEASURES
+            }
+        return self._cum
+
+    def query(self, start=None, end=None, products=None, group='total'):
+        if group not in GROUPS:
+            raise RollupQueryError(f"group must be one of {', '.join(GROUPS)}")
+        if products:
+            unknown = [p for p in products if p not in self.products]
+            if unknown:
+                raise RollupQueryError(f'unknown product(s): {", ".join(unknown)}')
+            rows = np.searchsorted(self.products, products)
+        else:
+            rows = np.arange(len(self.products))
+
+        days = self.days
+        lo = 0 if start is None else int(np.searchsorted(days, np.datetime64(start, 'D')))
+        hi = len(days) if end is None else int(np.searchsorted(days, np.datetime64(end, 'D'), side='right'))
+        hi = max(lo, hi)
+
+        if group in ('total', 'product'):
+            cum = self._cumulative()
+            per_product = {name: cum[name][rows, hi] - cum[name][rows, lo] for name in MEASURES}
+            if group == 'total':
+                return {name: int(values.sum()) for name, values in per_product.items()}
+            return [{'product': self.products[r], **{name: int(per_product[name][i]) for name in MEASURES}}
+                    for i, r in enumerate(rows)]
+
+        window = pd.DatetimeIndex(days[lo:hi])
+        frame = pd.DataFrame({name: getattr(self, name)[rows, lo:hi].sum(axis=0) for name in MEASURES}, index=window)
+        grouped = frame.groupby(_bucket_keys(window, group), sort=group == 'weekday').sum()
+        labels = grouped.index.tolist()
+        if group == 'weekday':
+            labels = [calendar.day_name[d] for d in labels]
+        return [{group: label, **{name: int(v) for name, v in zip(MEASURES, values)}}
+                for label, values in zip(labels, grouped[list(MEASURES)].values)]
+
+    def save(self, path, sources=None):
+        tmp_path = f'{path}.tmp'
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        cum = self._cumulative()
+        for name in MEASURES:
+            np.save(os.path.join(tmp_path, f'{name}.npy'), cum[name])
+        with open(os.path.join(tmp_path, 'meta.json'), 'w', encoding='utf-8') as f:
+            first_day = None if self.first_day is None else str(self.first_day)
+            json.dump({'products': self.products, 'first_day': first_day, 'sources': sources}, f)
+        # Swap directories so readers never see a half-written cube
+        old_path = f'{path}.old'
+        shutil.rmtree(old_path, ignore_errors=True)
+        if os.path.exists(path):
+            os.replace(path, old_path)
+        os.replace(tmp_path, path)
+        shutil.rmtree(old_path, ignore_errors=True)
+
+    @classmethod
+    def load(cls, path):
+        # Only prefix sums are stored; the per-day values are their differences
+        with open(os.path.join(path, 'meta.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+        cum = {name: np.load(os.path.join(path, f'{name}.npy')) for name in MEASURES}
+        first_day = None if meta['first_day'] is None else np.datetime64(meta['first_day'], 'D')
+        cube = cls(meta['products'], first_day, np.diff(cum['units'], axis=1), np.diff(cum['revenue'], axis=1))
+        cube._cum = cum
+        cube.sources = meta.get('sources')
+        return cube
+
+
+def _from_rows(products, days, units, revenue):
+    names = sorted(set(products))
+    first_day, last_day = days.min(), days.max()
+    shape = (len(names), int((last_day - first_day).astype(int)) + 1)
+    rows = np.searchsorted(names, products)
+    cols = (days - first_day).astype(int)
+    cube_units, cube_revenue = np.zeros(shape, dtype='int64'), np.zeros(shape, dtype='int64')
+    np.add.at(cube_units, (rows, cols), units)
+    np.add.at(cube_revenue, (rows, cols), revenue)
+    return RollupCube(names, first_day, cube_units, cube_revenue)
+
+
+def _bucket_keys(days, group):
+    if group == 'day':
+        return days.strftime('%Y-%m-%d')
+    if group == 'week':
+        iso = days.isocalendar()
+        return [f'{y}-W{w:02d}' for y, w in zip(iso['year'], iso['week'])]
+    if group == 'month':
+        return days.strftime('%Y-%m')
+    return days.weekday
+
+
+def parse_query(args):
+    try:
+        start = np.datetime64(args['start'], 'D') if args.get('start') else None
+        end = np.datetime64(args['end'], 'D') if args.get('end') else None
+    except ValueError:
+        raise RollupQueryError('start and end must be dates (YYYY-MM-DD)')
+    products = [p for p in args.getlist('product') if p]
+    return {'start': start, 'end': end, 'products': products, 'group': args.get('group', 'total')}
+
+
+_loaded = OrderedDict()
+_loaded_lock = threading.Lock()
+
+
+def load_cached(path):
+    # Keep recently queried cubes in memory; a rewritten cube has a new mtime
+    key = (path, os.stat(os.path.join(path, 'meta.json')).st_mtime_ns)
+    with _loaded_lock:
+        if key in _loaded:
+            _loaded.move_to_end(key)
+            return _loaded[key]
+    cube = RollupCube.load(path)
+    with _loaded_lock:
+        _loaded[key] = cube
+        while len(_loaded) > LOADED_CUBES:
+            _loaded.popitem(last=False)
+    return cube
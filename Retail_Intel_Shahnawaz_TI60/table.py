@@ -0,0 +1,96 @@
+import datetime
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from analytics import COLUMNS
+from columnar import read_table
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+class TableQueryError(ValueError):
+    pass
+
+
+def parse_query(args):
+    try:
+        page = int(args.get('page', 1))
+        page_size = int(args.get('page_size', DEFAULT_PAGE_SIZE))
+        start = _parse_date(args.get('start'))
+        end = _parse_date(args.get('end'))
+    except ValueError as e:
+        raise TableQueryError(str(e))
+    if page < 1 or not 1 <= page_size <= MAX_PAGE_SIZE:
+        raise TableQueryError(f'page must be >= 1 and page_size between 1 and {MAX_PAGE_SIZE}')
+
+    columns = [c for c in args.get('columns', '').split(',') if c] or list(COLUMNS)
+    sort = args.get('sort') or None
+    order = args.get('order', 'asc')
+    unknown = [c for c in columns + ([sort] if sort else []) if c not in COLUMNS]
+    if unknown:
+        raise TableQueryError(f'unknown column(s): {", ".join(unknown)}')
+    if order not in ('asc', 'desc'):
+        raise TableQueryError("order must be 'asc' or 'desc'")
+
+    products = [p for p in args.getlist('product') if p]
+    return {
+        'page': page, 'page_size': page_size, 'columns': columns, 'sort': sort,
+        'order': order, 'products': products, 'start': start, 'end': end,
+    }
+
+
+def _parse_date(value):
+    if not value:
+        return None
+    return datetime.datetime.strptime(value, '%Y-%m-%d')
+
+
+def query_page(paths, page=1, page_size=DEFAULT_PAGE_SIZE, columns=COLUMNS, sort=None, order='asc',
+               products=(), start=None, end=None):
+    # Only the projected, sorted and filtered columns are mapped in
+    needed = list(columns)
+    if sort and sort not in needed:
+        needed.append(sort)
+    if products and 'Product' not in needed:
+        needed.append('Product')
+    if (start or end) and 'Date' not in needed:
+        needed.append('Date')
+    table = read_table(paths, needed)
+
+    mask = None
+    if products:
+        mask = _and(mask, pc.is_in(table['Product'], value_set=pa.array(products, pa.string())))
+    if start:
+        mask = _and(mask, pc.greater_equal(table['Date'], pa.scalar(start, pa.timestamp('ms'))))
+    if end:
+        end_exclusive = end + datetime.timedelta(days=1)
+        mask = _and(mask, pc.less(table['Date'], pa.scalar(end_exclusive, pa.timestamp('ms'))))
+    if mask is not None:
+        table = table.filter(mask)
+
+    total_rows = table.num_rows
+    offset = (page - 1) * page_size
+    if sort:
+        order_key = 'ascending' if order == 'asc' else 'descending'
+        indices = pc.sort_indices(table, sort_keys=[(sort, order_key)])
+        table = table.take(indices.slice(offset, page_size))
+    else:
+        table = table.slice(offset, page_size)
+
+    table = table.select(columns)
+    if 'Date' in columns:
+        table = table.set_column(columns.index('Date'), 'Date', pc.strftime(table['Date'], '%Y-%m-%d'))
+    return {
+        'columns': list(columns),
+        'rows': [list(row.values()) for row in table.to_pylist()],
+        'page': page,
+        'page_size': page_size,
+        'total_rows': total_rows,
+        'total_pages': (total_rows + page_size - 1) // page_size,
+    }
+
+
+def _and(mask, condition):
+    return condition if mask is None else pc.and_(mask, condition)
@@ -1,4 +1,6 @@
-import os, threading, time, random
+import os, threading, time, random, argparse, queue
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 import numpy as np
 import tkinter as tk
 from tkinter import messagebox, simpledialog
@@ -41,6 +43,30 @@ except ImportError:
 EMBEDDING_FILE = "manwa_enroll_embed.npy"
 PASSWORD_FILE = "manwa_locker.txt"
 GEMINI_KEY = "YOUR_GEMINI_KEY"  # ← Put your key here!
+SAMPLE_RATE = 16000
+VERIFY_THRESHOLD = 0.75
+# Streaming VAD: 30 ms frames against an adaptive noise floor
+VAD_FRAME_MS = 30
+VAD_START_MS = 90         # this much speech opens an utterance
+VAD_HANGOVER_MS = 600     # this much silence closes it
+VAD_PREROLL_MS = 300      # audio kept from before the onset
+VAD_MIN_RMS = 0.01
+VAD_NOISE_RATIO = 3.0
+VAD_MAX_UTTERANCE_SECONDS = 8
+VAD_OVERLAP_SECONDS = 1.5  # a cut-off utterance's tail is repeated at the start of the next one
+RING_SECONDS = 16
+# Offline wake-phrase spotting: log-mel templates from enrollment, matched with DTW
+WAKE_TEMPLATES_FILE = "manwa_wake_templates.npz"
+KWS_FRAME = 400           # 25 ms
+KWS_HOP = 160             # 10 ms
+KWS_NFFT = 512
+KWS_MELS = 40
+KWS_STRETCH_PENALTY = 0.1 # extra cost for holding one input frame against several template frames
+KWS_THRESHOLD_MARGIN = 1.25
+KWS_DEFAULT_THRESHOLD = 0.3
+KWS_THRESHOLD_RANGE = (0.25, 0.4)  # calibrated threshold is clamped to this
+UNLOCK_WORKERS = 2
+TIMING_HISTORY = 50
 
 def speak(text):
     engine = pyttsx3.init()
@@ -62,20 +88,120 @@ def record_audio(filename, duration=3, samplerate=16000):
     speak(f"Recording complete")
     return filename
 
+class VerificationEngine:
+    """Long-lived speaker verifier shared by the wake loop and the buttons.
+
+    The encoder is loaded once (lazily, or up front by warm_up) and the
+    enrolled embedding is kept in memory, reloaded only when the .npy file
+    changes on disk. verify() takes audio already in memory (a float array)
+    or a wav file path.
+    """
+    def __init__(self, embedding_file=EMBEDDING_FILE, threshold=VERIFY_THRESHOLD):
+        self.embedding_file = embedding_file
+        self.threshold = threshold
+        self._encoder = None
+        self._ref_embed = None
+        self._ref_mtime = None
+        self._lock = threading.Lock()
+        self.timings = {}
+
+    @property
+    def encoder(self):
+        with self._lock:
+            if self._encoder is None:
+                start = time.perf_counter()
+                self._encoder = VoiceEncoder(verbose=False)
+                self.timings["encoder_load"] = time.perf_counter() - start
+            return self._encoder
+
+    def warm_up(self):
+        self.encoder
+        self.reference()
+
+    def reference(self):
+        try:
+            mtime = os.stat(self.embedding_file).st_mtime_ns
+        except FileNotFoundError:
+            self._ref_embed, self._ref_mtime = None, None
+            return None
+        if mtime != self._ref_mtime:
+            self._ref_embed, self._ref_mtime = np.load(self.embedding_file), mtime
+        return self._ref_embed
+
+    def save_reference(self, embed):
+        np.save(self.embedding_file, embed)
+        self._ref_embed, self._ref_mtime = embed, os.stat(self.embedding_file).st_mtime_ns
+
+    def embed(self, wav, samplerate=SAMPLE_RATE, cancel=None):
+        # preprocess_wav loads a path itself, or resamples/trims an in-memory array
+        if isinstance(wav, np.ndarray):
+            wav = preprocess_wav(wav.astype(np.float32, copy=False), source_sr=samplerate)
+        else:
+            wav = preprocess_wav(wav)
+        if cancel is not None and cancel.is_set():
+            return None
+        return self.encoder.embed_utterance(wav)
+
+    def similarity(self, wav, samplerate=SAMPLE_RATE, cancel=None):
+        ref_embed = self.reference()
+        if ref_embed is None or (cancel is not None and cancel.is_set()):
+            return None
+        test_embed = self.embed(wav, samplerate, cancel)
+        if test_embed is None:
+            return None
+        return float(np.dot(ref_embed, test_embed)/(np.linalg.norm(ref_embed)*np.linalg.norm(test_embed)))
+
+    def verify(self, wav, samplerate=SAMPLE_RATE, cancel=None):
+        # None if cancelled: the caller has already decided without us
+        start = time.perf_counter()
+        score = self.similarity(wav, samplerate, cancel)
+        self.timings["verify"] = time.perf_counter() - start
+        if cancel is not None and cancel.is_set():
+            return None
+        return score is not None and score > self.threshold
+
+verification_engine = VerificationEngine()
+
+def benchmark_verification(wav_file, runs=5):
+    # Cold = what every unlock attempt used to cost (new encoder + np.load); warm = shared engine
+    wav, samplerate = sf.read(wav_file, dtype="float32")
+    if wav.ndim > 1: wav = wav.mean(axis=1)
+    cold = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        ref_embed = np.load(EMBEDDING_FILE)
+        test_embed = VoiceEncoder(verbose=False).embed_utterance(preprocess_wav(wav_file))
+        np.dot(ref_embed, test_embed)/(np.linalg.norm(ref_embed)*np.linalg.norm(test_embed))
+        cold.append(time.perf_counter() - start)
+    engine = VerificationEngine()
+    start = time.perf_counter()
+    engine.verify(wav, samplerate)
+    first = time.perf_counter() - start
+    warm = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        engine.verify(wav, samplerate)
+        warm.append(time.perf_counter() - start)
+    print(f"{len(wav)/samplerate:.1f} s of audio, {runs} runs")
+    print(f"cold (encoder per call):  median {np.median(cold)*1000:8.1f} ms")
+    print(f"engine first call:        {first*1000:8.1f} ms (encoder load {engine.timings['encoder_load']*1000:.1f} ms)")
+    print(f"engine warm:              median {np.median(warm)*1000:8.1f} ms")
+
 def enroll_speaker_multi(samples=3, locker_pwd=None):
-    encoder = VoiceEncoder()
-    all_embeds = []
+    # Each sample should be the wake phrase: it trains both the voice and the phrase spotter
+    all_embeds, fnames = [], []
     for i in range(samples):
         fname = f"enroll_voice_{i+1}.wav"
         # Only neutral progress voice
         speak(f"Recording {i+1} started")
-        record_audio(fname)
-        wav = preprocess_wav(fname)
-        embed = encoder.embed_utterance(wav)
+        record_audio(fname, duration=4)
+        embed = verification_engine.embed(fname)
         all_embeds.append(embed)
+        fnames.append(fname)
         speak(f"Sample {i+1} complete")
     avg_embed = np.mean(all_embeds, axis=0)
-    np.save(EMBEDDING_FILE, avg_embed)
+    verification_engine.save_reference(avg_embed)
+    wake_spotter.save_templates([load_wav(f) for f in fnames])
     if locker_pwd:
         with open(PASSWORD_FILE,"w") as f: f.write(locker_pwd)
     speak("Your voice has been trained and saved.")
@@ -87,21 +213,141 @@ def check_locker_password():
     password = simpledialog.askstring("Voice Locker", "Enter password to overwrite voice:", show='*')
     return password == correct_pwd
 
-def test_speaker(filename):
-    if not os.path.exists(EMBEDDING_FILE):
+def test_speaker(audio, samplerate=SAMPLE_RATE, cancel=None):
+    # audio is a wav path or a float array already in memory
+    if verification_engine.reference() is None:
         speak("No enrolled voice found.")
         return False
-    ref_embed = np.load(EMBEDDING_FILE)
-    wav = preprocess_wav(filename)
-    encoder = VoiceEncoder()
-    test_embed = encoder.embed_utterance(wav)
-    similarity = np.dot(ref_embed, test_embed)/(np.linalg.norm(ref_embed)*np.linalg.norm(test_embed))
-    return similarity > 0.75
-
-def recognize_phrase(filename):
+    return verification_engine.verify(audio, samplerate, cancel)
+
+class AudioRingBuffer:
+    """Preallocated float32 ring buffer filled straight from the InputStream callback.
+
+    write() copies each callback block into place (no per-sample Python
+    objects, no allocation). Positions count samples since the stream
+    started, matching StreamingVAD's; read(start, end) copies one utterance
+    out in order, into a caller-owned array if one is given.
+    """
+    def __init__(self, seconds, samplerate=SAMPLE_RATE):
+        self.samplerate = samplerate
+        self.data = np.zeros(int(seconds * samplerate), dtype=np.float32)
+        self.written = 0
+        self._lock = threading.Lock()
+
+    @property
+    def nbytes(self):
+        return self.data.nbytes
+
+    def write(self, samples):
+        size = len(self.data)
+        if len(samples) > size:
+            samples = samples[-size:]
+        n = len(samples)
+        with self._lock:
+            start = self.written % size
+            first = min(n, size - start)
+            self.data[start:start + first] = samples[:first]
+            self.data[:n - first] = samples[first:]
+            self.written += n
+
+    def read(self, start, end, out=None):
+        # Samples [start, end) counted from the first write; anything already overwritten is skipped
+        size = len(self.data)
+        with self._lock:
+            start = max(start, self.written - size, 0)
+            end = min(end, self.written)
+            n = max(end - start, 0)
+            if out is None:
+                out = np.empty(n, dtype=np.float32)
+            out = out[:n]
+            offset = start % size
+            first = min(n, size - offset)
+            out[:first] = self.data[offset:offset + first]
+            out[first:] = self.data[:n - first]
+        return out
+
+class StreamingVAD:
+    """Energy-based voice activity detector that cuts utterances while audio streams in.
+
+    feed() is called from the InputStream callback with the same blocks the
+    ring buffer gets, so positions line up with AudioRingBuffer.read(). Each
+    finished utterance is put on `segments` as (start, end) as soon as the
+    hangover silence has passed. Utterances keep a short pre-roll, and one
+    longer than VAD_MAX_UTTERANCE_SECONDS is cut with an overlap so a phrase
+    crossing the cut appears whole in the next segment.
+    """
+    def __init__(self, samplerate=SAMPLE_RATE):
+        self.frame = int(samplerate * VAD_FRAME_MS / 1000)
+        self.start_frames = max(1, VAD_START_MS // VAD_FRAME_MS)
+        self.end_frames = max(1, VAD_HANGOVER_MS // VAD_FRAME_MS)
+        self.preroll = int(samplerate * VAD_PREROLL_MS / 1000)
+        self.max_samples = int(samplerate * VAD_MAX_UTTERANCE_SECONDS)
+        self.overlap = int(samplerate * VAD_OVERLAP_SECONDS)
+        self.segments = queue.Queue()
+        self.position = 0
+        self.noise_floor = VAD_MIN_RMS / VAD_NOISE_RATIO
+        self._carry = np.zeros(self.frame, dtype=np.float32)
+        self._carry_len = 0
+        self._flush = False
+        self._reset()
+
+    def _reset(self):
+        self.start = None
+        self.voiced = 0
+        self.silent = 0
+
+    def flush(self):
+        # Drop queued and half-heard utterances (e.g. our own TTS); applied on the audio thread
+        self._flush = True
+        while not self.segments.empty():
+            self.segments.get_nowait()
+
+    def feed(self, samples):
+        if self._flush:
+            self._flush = False
+            self._reset()
+        if self._carry_len:
+            samples = np.concatenate((self._carry[:self._carry_len], samples))
+        n = len(samples) // self.frame * self.frame
+        if n:
+            levels = np.sqrt(np.mean(np.square(samples[:n].reshape(-1, self.frame)), axis=1))
+            for level in levels:
+                self._frame(float(level))
+        self._carry_len = len(samples) - n
+        self._carry[:self._carry_len] = samples[n:]
+
+    def _frame(self, level):
+        self.position += self.frame
+        speech = level > max(VAD_MIN_RMS, self.noise_floor * VAD_NOISE_RATIO)
+        if self.start is None:
+            # Floor follows quiet frames down at once and louder ones up slowly
+            self.noise_floor = level if level < self.noise_floor else 0.99 * self.noise_floor + 0.01 * level
+            self.voiced = self.voiced + 1 if speech else 0
+            if self.voiced >= self.start_frames:
+                self.start = max(self.position - self.voiced * self.frame - self.preroll, 0)
+                self.silent = 0
+            return
+        self.silent = 0 if speech else self.silent + 1
+        if self.silent >= self.end_frames:
+            self.segments.put((self.start, self.position))
+            self._reset()
+        elif self.position - self.start >= self.max_samples:
+            self.segments.put((self.start, self.position))
+            self.start = self.position - self.overlap
+
+def to_audio_data(wav, samplerate=SAMPLE_RATE):
+    # 16-bit PCM is what recognize_google is sent anyway
+    pcm = (np.clip(wav, -1.0, 1.0) * 32767).astype(np.int16)
+    return sr.AudioData(pcm.tobytes(), samplerate, 2)
+
+def recognize_phrase(audio, samplerate=SAMPLE_RATE):
+    # audio is a wav path or a float array already in memory
     r = sr.Recognizer()
-    with sr.AudioFile(filename) as source:
-        audio = r.record(source)
+    if isinstance(audio, np.ndarray):
+        audio = to_audio_data(audio, samplerate)
+    else:
+        with sr.AudioFile(audio) as source:
+            audio = r.record(source)
     try:
         txt = r.recognize_google(audio).lower()
         txt = txt.replace(".", " ").replace(",", " ").strip()
@@ -112,6 +358,224 @@ def is_wake_phrase(phrase):
     # Accepts "hello agent, this is manwa"
     return phrase.startswith("hello agent") and "this is manwa" in phrase
 
+def load_wav(filename):
+    wav, samplerate = sf.read(filename, dtype="float32")
+    if wav.ndim > 1: wav = wav.mean(axis=1)
+    if samplerate != SAMPLE_RATE:
+        n = int(len(wav) * SAMPLE_RATE / samplerate)
+        wav = np.interp(np.linspace(0, len(wav) - 1, n), np.arange(len(wav)), wav).astype(np.float32)
+    return wav
+
+def mel_filterbank(samplerate=SAMPLE_RATE, n_fft=KWS_NFFT, n_mels=KWS_MELS):
+    mel = lambda f: 2595 * np.log10(1 + f / 700)
+    hz = lambda m: 700 * (10 ** (m / 2595) - 1)
+    bins = np.floor((n_fft + 1) * hz(np.linspace(mel(60), mel(samplerate / 2), n_mels + 2)) / samplerate).astype(int)
+    bank = np.zeros((n_mels, n_fft // 2 + 1), dtype=np.float32)
+    for m in range(1, n_mels + 1):
+        left, center, right = bins[m - 1], bins[m], bins[m + 1]
+        bank[m - 1, left:center] = (np.arange(left, center) - left) / max(center - left, 1)
+        bank[m - 1, center:right] = (right - np.arange(center, right)) / max(right - center, 1)
+    return bank
+
+MEL_BANK = mel_filterbank()
+KWS_WINDOW = np.hanning(KWS_FRAME).astype(np.float32)
+
+def trim_silence(wav):
+    # Keeps first..last frame above the VAD level (or 5% of the peak, if louder)
+    if len(wav) < KWS_FRAME: return wav
+    frames = np.lib.stride_tricks.sliding_window_view(wav, KWS_FRAME)[::KWS_HOP]
+    rms = np.sqrt(np.mean(np.square(frames), axis=1))
+    voiced = np.flatnonzero(rms > max(VAD_MIN_RMS, 0.05 * rms.max()))
+    if len(voiced) == 0: return wav
+    return wav[voiced[0] * KWS_HOP:voiced[-1] * KWS_HOP + KWS_FRAME]
+
+def log_mel_features(wav):
+    # Unit-length, mean-normalised log-mel frames, so a dot product is a cosine similarity
+    if len(wav) < KWS_FRAME:
+        wav = np.pad(wav, (0, KWS_FRAME - len(wav)))
+    frames = np.lib.stride_tricks.sliding_window_view(wav, KWS_FRAME)[::KWS_HOP] * KWS_WINDOW
+    power = np.square(np.abs(np.fft.rfft(frames, KWS_NFFT)))
+    mel = power @ MEL_BANK.T
+    # A 40 dB floor under the loudest band keeps background hiss from dominating quiet bands
+    feats = np.log(np.maximum(mel, mel.max() * 1e-4 + 1e-10))
+    # Mean from frames within 30 dB of the loudest, so leading/trailing silence does not shift it
+    energy = mel.sum(axis=1)
+    feats -= feats[energy >= energy.max() * 1e-3].mean(axis=0)
+    feats /= np.linalg.norm(feats, axis=1, keepdims=True) + 1e-8
+    return feats.astype(np.float32)
+
+def subsequence_dtw(template, feats):
+    """Mean cosine distance of the best alignment of the whole template to any stretch of feats.
+
+    Each step advances one template frame and 0, 1 or 2 input frames, so a
+    row is computed in one vectorised pass and every path has the template's
+    length, which keeps scores comparable across templates.
+    """
+    if len(feats) < len(template) // 2:
+        return np.inf
+    cost = 1.0 - template @ feats.T
+    acc = cost[0].copy()
+    for row in cost[1:]:
+        best = acc + KWS_STRETCH_PENALTY
+        np.minimum(best[1:], acc[:-1], out=best[1:])
+        np.minimum(best[2:], acc[:-2], out=best[2:])
+        acc = row + best
+    return float(acc.min() / len(template))
+
+class WakePhraseSpotter:
+    """On-device spotter for the wake phrase, trained from the enrollment recordings.
+
+    Each enrollment sample becomes a log-mel template; an utterance matches
+    when its DTW distance to the closest template is under a threshold set
+    from how far apart the templates are from each other. Templates are kept
+    in memory and reloaded when the file changes, like the speaker embedding.
+    """
+    def __init__(self, templates_file=WAKE_TEMPLATES_FILE):
+        self.templates_file = templates_file
+        self.templates = None
+        self.threshold = KWS_DEFAULT_THRESHOLD
+        self._mtime = None
+        self.timings = {}
+
+    def load(self):
+        try:
+            mtime = os.stat(self.templates_file).st_mtime_ns
+        except FileNotFoundError:
+            self.templates, self._mtime = None, None
+            return None
+        if mtime != self._mtime:
+            with np.load(self.templates_file) as data:
+                self.templates = [data[f"t{i}"] for i in range(int(data["count"]))]
+                self.threshold = float(data["threshold"])
+            self._mtime = mtime
+        return self.templates
+
+    def save_templates(self, wavs):
+        templates = [log_mel_features(trim_silence(w)) for w in wavs]
+        # Calibrate on how well the samples match each other
+        pairs = [subsequence_dtw(a, b) for i, a in enumerate(templates) for j, b in enumerate(templates) if i != j]
+        pairs = [d for d in pairs if np.isfinite(d)]
+        threshold = float(np.clip(max(pairs) * KWS_THRESHOLD_MARGIN, *KWS_THRESHOLD_RANGE)) if pairs else KWS_DEFAULT_THRESHOLD
+        np.savez(self.templates_file, count=len(templates), threshold=threshold,
+                 **{f"t{i}": t for i, t in enumerate(templates)})
+        self.templates, self.threshold = templates, threshold
+        self._mtime = os.stat(self.templates_file).st_mtime_ns
+
+    def score(self, wav, cancel=None):
+        templates = self.load()
+        if not templates:
+            return None
+        feats = log_mel_features(wav)
+        best = np.inf
+        # Checked before each template, the first time right after feature extraction
+        for t in templates:
+            if cancel is not None and cancel.is_set():
+                return None
+            best = min(best, subsequence_dtw(t, feats))
+        return best
+
+    def spot(self, wav, cancel=None):
+        # (matched, score); matched is None if cancelled
+        start = time.perf_counter()
+        score = self.score(wav, cancel)
+        self.timings["spot"] = time.perf_counter() - start
+        if cancel is not None and cancel.is_set():
+            return None, score
+        return score is not None and score <= self.threshold, score
+
+wake_spotter = WakePhraseSpotter()
+
+def detect_wake_phrase(wav, samplerate=SAMPLE_RATE, cancel=None):
+    """(matched, text to show). Uses the local spotter; cloud ASR only if nothing is enrolled yet.
+
+    The spotter only matches templates, so its text is a label with the DTW
+    score rather than a transcript.
+    """
+    if not wake_spotter.load():
+        phrase = recognize_phrase(wav, samplerate)
+        return is_wake_phrase(phrase), phrase
+    if isinstance(wav, str):
+        wav = load_wav(wav)
+    matched, score = wake_spotter.spot(wav, cancel)
+    if matched is None:
+        return None, ""
+    return matched, f"wake phrase {'matched' if matched else 'not matched'} (score {score:.2f})"
+
+unlock_pool = ThreadPoolExecutor(max_workers=UNLOCK_WORKERS, thread_name_prefix="unlock")
+
+def run_unlock_stages(wav, samplerate=SAMPLE_RATE):
+    """Wake-phrase detection and speaker verification side by side on unlock_pool.
+
+    Returns (matched_phrase, matched_voice, phrase, timings). The first stage
+    to reject sets a cancel event that the other checks between steps, and
+    its result is not waited for: it comes back as None. timings has the
+    queue wait and run time in seconds of each stage that finished, the
+    total, and which stage rejected (if any). A stage that raises counts as
+    a rejection.
+    """
+    if isinstance(wav, np.ndarray):
+        # The caller reuses its buffer for the next utterance; a stage still running after a reject keeps this copy
+        wav = wav.copy()
+    cancel = threading.Event()
+    submitted = time.perf_counter()
+
+    def stage(func):
+        # Timing travels back with the result, so a stage still running after we return writes nothing shared
+        def run():
+            start = time.perf_counter()
+            try:
+                result, error = func(wav, samplerate, cancel), None
+            except Exception as e:
+                result, error = None, e
+            return result, error, start - submitted, time.perf_counter() - start
+        return unlock_pool.submit(run)
+
+    futures = {stage(detect_wake_phrase): "wake", stage(test_speaker): "verify"}
+    results, phrase, timings = {"wake": None, "verify": None}, "", {}
+    pending = set(futures)
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            name = futures[future]
+            result, error, timings[f"{name}_wait"], timings[name] = future.result()
+            if error is not None:
+                print(f"{name} stage failed: {error!r}")
+                result = (False, "") if name == "wake" else False
+            if name == "wake":
+                results["wake"], phrase = result
+            else:
+                results["verify"] = result
+            if results[name] is False and not cancel.is_set():
+                cancel.set()
+                timings["rejected_by"] = name
+                for other in pending:
+                    other.cancel()
+                pending = set()
+    timings["total"] = time.perf_counter() - submitted
+    return results["wake"], results["verify"], phrase, timings
+
+def benchmark_wake_spotter(fixtures, cloud=False):
+    # Latency of the local spotter (and optionally recognize_google) per recorded wav
+    files = sorted(os.path.join(fixtures, f) for f in os.listdir(fixtures) if f.lower().endswith(".wav")) if os.path.isdir(fixtures) else [fixtures]
+    if wake_spotter.load() is None:
+        print(f"No {WAKE_TEMPLATES_FILE}: enroll first (Train) so there is something to spot.")
+        return
+    print(f"{len(wake_spotter.templates)} templates, threshold {wake_spotter.threshold:.3f}")
+    local, remote = [], []
+    for path in files:
+        wav = load_wav(path)
+        start = time.perf_counter()
+        score = wake_spotter.score(wav)
+        local.append(time.perf_counter() - start)
+        line = f"{os.path.basename(path):<32}{len(wav)/SAMPLE_RATE:5.1f} s  score {score:.3f} {'MATCH' if score <= wake_spotter.threshold else '-':<6}  local {local[-1]*1000:7.1f} ms"
+        if cloud:
+            start = time.perf_counter()
+            phrase = recognize_phrase(wav)
+            remote.append(time.perf_counter() - start)
+            line += f"  cloud {remote[-1]*1000:7.1f} ms {'MATCH' if is_wake_phrase(phrase) else '-'}"
+        print(line)
+    print(f"local median {np.median(local)*1000:.1f} ms" + (f", cloud median {np.median(remote)*1000:.1f} ms" if remote else ""))
+
 # ---- DESIGN + FLOW ----
 
 class FuturisticVoiceUI:
@@ -126,6 +590,12 @@ class FuturisticVoiceUI:
         self.unlocked = False
         self.waveform = np.zeros(80)
         self.detected_phrase = ""
+        # One capture buffer and one window array for the life of the app
+        self.ring = AudioRingBuffer(RING_SECONDS)
+        self.vad = StreamingVAD(self.ring.samplerate)
+        self.window = np.empty(len(self.ring.data), dtype=np.float32)
+        self.stream = None
+        self.stage_history = deque(maxlen=TIMING_HISTORY)
         # Canvas for ring/wave+bg
         self.canvas = tk.Canvas(master, bg="#0b1321", highlightthickness=0)
         self.canvas.pack(fill=tk.BOTH, expand=True)
@@ -161,6 +631,8 @@ class FuturisticVoiceUI:
         for b,i in zip([self.btn_enroll, self.btn_test, self.btn_locker, self.btn_exit], range(4)):
             b.grid(row=i, column=0, pady=8, ipadx=10, ipady=5, sticky="ew")
 
+        # Load the speaker encoder now so the first unlock does not pay for it
+        threading.Thread(target=verification_engine.warm_up, daemon=True).start()
         # Animations
         threading.Thread(target=self._background_animation, daemon=True).start()
         threading.Thread(target=self._ring_and_wave_animation, daemon=True).start()
@@ -235,6 +707,35 @@ class FuturisticVoiceUI:
             self.master.update_idletasks()
             self.canvas.after(35)
 
+    def _audio_callback(self, indata, frames, time_info, status):
+        vol = np.abs(indata).mean()
+        self.waveform = np.roll(self.waveform, -1)
+        self.waveform[-1] = min(1.0, 3.7*vol)
+        self.ring.write(indata[:, 0])
+        self.vad.feed(indata[:, 0])
+
+    def _next_utterance(self):
+        # The stream never stops; this just waits for the VAD to close the next utterance
+        if self.stream is None:
+            self.stream = sd.InputStream(channels=1, samplerate=self.ring.samplerate, dtype="float32",
+                                         blocksize=self.vad.frame, callback=self._audio_callback)
+            self.stream.start()
+        self.vad.flush()
+        self.master.update()
+        start, end = self.vad.segments.get()
+        return self.ring.read(start, end, out=self.window)
+
+    def _report_window(self, wav, timings):
+        # Per-stage times for this utterance, then medians over the recent ones
+        self.stage_history.append(timings)
+        stages = [k for k, v in timings.items() if isinstance(v, float)]
+        medians = {k: np.median([t[k] for t in self.stage_history if k in t]) for k in stages}
+        print(f"utterance {len(wav)/self.ring.samplerate:.1f} s, buffer {self.ring.nbytes/1024:.0f} KiB: " +
+              ", ".join(f"{k} {timings[k]*1000:.0f} ms" for k in stages) +
+              (f", rejected by {timings['rejected_by']}" if "rejected_by" in timings else "") +
+              f" | median of last {len(self.stage_history)}: " +
+              ", ".join(f"{k} {v*1000:.0f} ms" for k, v in medians.items()))
+
     def _wakeword_listen_loop(self):
         while True:
             self.status_label.config(text="Listening for: 'Hello Agent, this is manwa'", fg="#21c9ff")
@@ -243,27 +744,14 @@ class FuturisticVoiceUI:
             self.listening = True; self.waveform = np.zeros_like(self.waveform)
 
             # Live record/display phrase/animation
-            samplerate, duration = 16000, 4
-            buffer, transcribed = [], ""
-            def callback(indata, frames, time, status):
-                vol = np.abs(indata).mean()
-                self.waveform = np.roll(self.waveform, -1)
-                self.waveform[-1] = min(1.0, 3.7*vol)
-                buffer.extend(indata[:,0].tolist())
-            self.master.update()
-            with sd.InputStream(channels=1, samplerate=samplerate, callback=callback):
-                time.sleep(duration)
-            buf_np = np.array(buffer)
-            tmp_file = "temp_unlock_test.wav"
-            sf.write(tmp_file, buf_np, samplerate)
+            wav = self._next_utterance()
             self.listening = False
 
-            # Recognize, display detected phrase
-            phrase = recognize_phrase(tmp_file)
+            # Phrase and voice are checked concurrently; whichever rejects first ends the attempt
+            matched_phrase, matched_voice, phrase, timings = run_unlock_stages(wav)
             self.phrase_label.config(text="DETECTED:  " + phrase.upper())
             self.master.update()
-            matched_phrase = is_wake_phrase(phrase)
-            matched_voice = test_speaker(tmp_file)
+            self._report_window(wav, timings)
             if matched_phrase and matched_voice:
                 self.status_label.config(text="Welcome Boss, voice recognized and system unlocked.", fg="#10ff3a")
             
@@ -280,21 +768,11 @@ class FuturisticVoiceUI:
                     while True:
                         self.status_label.config(text="Listening for your command...", fg="#31e8ea")
                         self.listening = True; self.waveform = np.zeros_like(self.waveform)
-                        samplerate, duration = 16000, 4
-                        buffer = []
-                        def callback(indata, frames, time, status):
-                            vol = np.abs(indata).mean()
-                            self.waveform = np.roll(self.waveform, -1)
-                            self.waveform[-1] = min(1.0, 3.7*vol)
-                            buffer.extend(indata[:,0].tolist())
-                        self.master.update()
-                        with sd.InputStream(channels=1, samplerate=samplerate, callback=callback):
-                            time.sleep(duration)
-                        buf_np = np.array(buffer)
-                        command_file = "nova_command_temp.wav"
-                        sf.write(command_file, buf_np, samplerate)
+                        wav = self._next_utterance()
                         self.listening = False
-                        user_command = recognize_phrase(command_file)
+                        start = time.perf_counter()
+                        user_command = recognize_phrase(wav)
+                        self._report_window(wav, {"asr": time.perf_counter() - start})
                         # Display command on screen for a moment
                         self.status_label.config(text="Command: " + user_command, fg="#69eaff")
                         self.master.update()
@@ -321,11 +799,11 @@ class FuturisticVoiceUI:
                 #------------------------
                   # Agent logic ready for next phase
                 
-            elif not matched_phrase:
+            elif matched_phrase is False:
                 self.status_label.config(text="Wrong phrase, try again.", fg="#fd4747")
                 self.phrase_label.config(text="Phrase Not Recognized!", fg="#ffadad")
                 speak("Sorry, the spoken phrase did not match.")
-            elif not matched_voice:
+            elif matched_voice is False:
                 self.status_label.config(text="Voice not recognized!", fg="#ef4141")
                 self.phrase_label.config(fg="#fdc8c8")
                 speak("Sorry, your voice was not recognized.")
@@ -334,7 +812,7 @@ class FuturisticVoiceUI:
 
     def _enroll_voice(self):
         try:
-            self.status_label.config(text="Recording multiple enrollment samples...", fg="#52fff8")
+            self.status_label.config(text="Recording enrollment samples: say 'Hello Agent, this is manwa' each time", fg="#52fff8")
             self.phrase_label.config(text="")
             self.master.update()
             enroll_speaker_multi(samples=3)
@@ -350,7 +828,7 @@ class FuturisticVoiceUI:
             self.master.update()
             test_file = "test_manwa_voice.wav"
             record_audio(test_file, duration=3)
-            phrase = recognize_phrase(test_file)
+            _, phrase = detect_wake_phrase(test_file)
             self.phrase_label.config(text="DETECTED:  " + phrase.upper())
             self.master.update()
             if test_speaker(test_file):
@@ -375,6 +853,18 @@ class FuturisticVoiceUI:
             speak("Incorrect password. Cannot change voice.")
 
 def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bench-verify", metavar="WAV", help="time cold vs warm speaker verification on a recording")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--bench-wake", metavar="WAV_OR_DIR", help="time the offline wake-phrase spotter on recorded wavs")
+    parser.add_argument("--cloud", action="store_true", help="with --bench-wake, also time recognize_google")
+    args = parser.parse_args()
+    if args.bench_verify:
+        benchmark_verification(args.bench_verify, args.runs)
+        return
+    if args.bench_wake:
+        benchmark_wake_spotter(args.bench_wake, args.cloud)
+        return
     root = tk.Tk()
     app = FuturisticVoiceUI(root)
     root.mainloop()